@@ -1,8 +1,10 @@
 from navigation import load_navigation
 from state.requirements import load_all_requirements
+from state.tickets import track_edit_page
 
 load_all_requirements()
 nav = load_navigation()
+track_edit_page(nav.url_path)
 nav.run()
 
 
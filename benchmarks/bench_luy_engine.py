@@ -0,0 +1,76 @@
+"""
+LuyEngine classification: per-row _match_score scan vs. the inverted index
+(classify_software) and the batch path (classify_many).
+
+    python benchmarks/bench_luy_engine.py [n_records]
+"""
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from components.luy_engine import LuyEngine  # noqa: E402
+
+CSV_PATH = ROOT / "components" / "domain_cap_map.csv"
+
+
+def scan_classify(engine, software_name, description, use_case=""):
+    """Classification as before the inverted index: _match_score per taxonomy row."""
+    text = engine._clean(f"{software_name} {description} {use_case}")
+    result = {}
+    for field, keyword_map in (("domains", engine.DOMAIN_KEYWORDS), ("capabilities", engine.CAPABILITY_KEYWORDS)):
+        scores = defaultdict(int)
+        for name, keywords in keyword_map.items():
+            scores[name] = engine._match_score(text, keywords)
+        result[field] = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    return result
+
+
+def make_records(engine, n, seed=1):
+    rng = random.Random(seed)
+    vocabulary = sorted({
+        word
+        for keywords in [*engine.DOMAIN_KEYWORDS.values(), *engine.CAPABILITY_KEYWORDS.values()]
+        for kw in keywords
+        for word in re.findall(r"\w+", kw)
+    })
+    return [
+        (f"Software {i}", " ".join(rng.sample(vocabulary, 12)), " ".join(rng.sample(vocabulary, 4)))
+        for i in range(n)
+    ]
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<28}{seconds:8.3f} s  {seconds / n * 1e6:9.1f} µs/record")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = LuyEngine(str(CSV_PATH), cache_size=0)
+    records = make_records(engine, n)
+    print(f"{n} records, {len(engine.DOMAIN_KEYWORDS)} domains, {len(engine.CAPABILITY_KEYWORDS)} capabilities")
+
+    expected = timed("per-row scan", lambda: [scan_classify(engine, *r) for r in records], n)
+    single = timed("classify_software (index)", lambda: [engine.classify_software(*r) for r in records], n)
+    batch = timed("classify_many (batch)", lambda: engine.classify_many(records), n)
+
+    cached = LuyEngine(str(CSV_PATH))
+    cached.classify_many(records)
+    timed("classify_many (cached)", lambda: cached.classify_many(records), n)
+
+    if not single == batch == expected:
+        sys.exit("results differ from the per-row scan")
+    print("results identical")
+
+
+if __name__ == "__main__":
+    main()
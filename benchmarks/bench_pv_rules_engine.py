@@ -0,0 +1,70 @@
+"""
+PVEngine responsibilities: filter loop per call vs. the precomputed lookup.
+
+    python benchmarks/bench_pv_rules_engine.py [n_calls]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from components.pv_rules_engine import PVEngine  # noqa: E402
+
+CSV_PATH = ROOT / "components" / "pv_journey.csv"
+
+
+def filter_loop(engine, product_type, scenario, level="L2"):
+    """get_pv_responsibilities as before the lookup: three list filters and a sort."""
+    result = [t for t in engine.tasks if product_type in t["relevanz"]]
+    allowed_processes = PVEngine.SCENARIO_MAP.get(scenario)
+    if allowed_processes:
+        result = [t for t in result if t["prozess"] in allowed_processes]
+    level_value = PVEngine.LEVELS[level]
+    result = [t for t in result if level_value >= PVEngine.PROCESS_MIN_LEVEL.get(t["prozess"], 0)]
+    return sorted(result, key=lambda x: x["prozess"])
+
+
+def group_loop(tasks):
+    grouped = {}
+    for t in tasks:
+        grouped.setdefault(t["prozess"], []).append(t)
+    return grouped
+
+
+def timed(label, fn, n):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<34}{seconds:8.3f} s  {seconds / n * 1e6:7.2f} µs/call")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    start = time.perf_counter()
+    engine = PVEngine(str(CSV_PATH))
+    print(f"{len(engine.tasks)} tasks, {len(engine.lookup)} lookup keys, "
+          f"engine built in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    rng = random.Random(1)
+    scenarios = [*PVEngine.SCENARIO_MAP, "Sonstiges"]
+    calls = [
+        (rng.choice(PVEngine.PRODUCT_TYPES), rng.choice(scenarios), rng.choice(list(PVEngine.LEVELS)))
+        for _ in range(n)
+    ]
+
+    expected = timed("filter loop", lambda: [filter_loop(engine, *c) for c in calls], n)
+    result = timed("get_pv_responsibilities (lookup)", lambda: [engine.get_pv_responsibilities(*c) for c in calls], n)
+    timed("filter loop + group", lambda: [group_loop(filter_loop(engine, *c)) for c in calls], n)
+    timed("lookup + group_by_process", lambda: [engine.group_by_process(engine.get_pv_responsibilities(*c)) for c in calls], n)
+
+    if [list(r) for r in result] != expected:
+        sys.exit("results differ from the filter loop")
+    print("results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# components/engine_registry.py
+import hashlib
+import os
+import threading
+import time
+
+from components.luy_engine import LuyEngine
+from components.pv_decision_engine import PVDecisionEngine
+from components.pv_rules_engine import PVEngine
+
+# ---------------------------------------------------------
+# Registered engines: name -> (factory(path), source file)
+# ---------------------------------------------------------
+ENGINE_SOURCES = {
+    "luy": (LuyEngine, "components/domain_cap_map.csv"),
+    "pv": (PVEngine, "components/pv_journey.csv"),
+    "pv_decision": (PVDecisionEngine, "components/pv_rules.yaml"),
+}
+
+# ---------------------------------------------------------
+# Process-wide state
+# ---------------------------------------------------------
+# Each engine is built once per process and shared by all sessions. Every
+# lookup stats its source file; when (mtime, size) changed and the content hash
+# differs, a new engine is built and swapped in. Sessions holding the old
+# instance keep using it until their next lookup.
+_ENGINES = {}
+_LOCK = threading.Lock()
+
+# name -> {engine.version: engine} for engines that expose a version, so
+# results computed with an older source can be diffed against the current one
+_VERSIONS = {}
+KEEP_VERSIONS = 10
+
+
+def _file_stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _build(name, stat_key, digest):
+    factory, path = ENGINE_SOURCES[name]
+    started = time.perf_counter()
+    engine = factory(path)
+    build_seconds = time.perf_counter() - started
+
+    previous = _ENGINES.get(name)
+    if getattr(engine, "version", None):
+        versions = _VERSIONS.setdefault(name, {})
+        versions[engine.version] = engine
+        while len(versions) > KEEP_VERSIONS:
+            del versions[next(iter(versions))]
+    _ENGINES[name] = {
+        "engine": engine,
+        "path": path,
+        "stat": stat_key,
+        "hash": digest,
+        "build_seconds": build_seconds,
+        "builds": (previous["builds"] if previous else 0) + 1,
+        "built_at": time.time(),
+    }
+    return engine
+
+
+def get_engine(name):
+    if name not in ENGINE_SOURCES:
+        raise ValueError(f"Unknown engine '{name}', must be one of {list(ENGINE_SOURCES)}")
+    path = ENGINE_SOURCES[name][1]
+
+    entry = _ENGINES.get(name)
+    stat_key = _file_stat(path)
+    if entry is not None and entry["stat"] == stat_key:
+        return entry["engine"]
+
+    with _LOCK:
+        entry = _ENGINES.get(name)
+        if entry is not None and entry["stat"] == stat_key:
+            return entry["engine"]
+
+        digest = _file_hash(path)
+        if entry is not None and entry["hash"] == digest:
+            # Touched but unchanged: keep the engine
+            entry["stat"] = stat_key
+            return entry["engine"]
+        return _build(name, stat_key, digest)
+
+
+def get_engine_version(name, version):
+    """A previously built engine by its version, or None if it is unknown."""
+    get_engine(name)
+    return _VERSIONS.get(name, {}).get(version)
+
+
+def get_luy_engine():
+    return get_engine("luy")
+
+
+def get_pv_engine():
+    return get_engine("pv")
+
+
+def get_pv_decision_engine():
+    return get_engine("pv_decision")
+
+
+def engine_metrics():
+    """One row per built engine: build time, build count and CSV version."""
+    return [
+        {
+            "engine": name,
+            "csv": entry["path"],
+            "version": entry["hash"][:12],
+            "builds": entry["builds"],
+            "rebuilds": entry["builds"] - 1,
+            "build_ms": round(entry["build_seconds"] * 1000, 1),
+            "built_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["built_at"])),
+        }
+        for name, entry in sorted(_ENGINES.items())
+    ]
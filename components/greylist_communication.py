@@ -1,5 +1,13 @@
 import streamlit as st
-from state.tickets import get_all_tickets, set_all_tickets
+from state.tickets import (
+    get_all_tickets,
+    open_edit_forms,
+    checkout_edit,
+    commit_edit,
+    edit_widget_key,
+    mark_edit_form_changed,
+    TicketConflictError,
+)
 from components.ticket_history import add_ticket_event
 
 def show_greylist_review(dept_name: str):
@@ -20,19 +28,22 @@ def show_greylist_review(dept_name: str):
     user = st.session_state.get("user", {})
     actor = user.get("username", "Unknown")
 
+    # Forms render from their base (kept across reruns), not the stored ticket
+    bases = open_edit_forms(t["ticket_id"] for t in greylist_tickets)
+
     for t in greylist_tickets:
-        t.setdefault("department_reviews", {})
-        t["department_reviews"].setdefault(dept_name, {})
-
-        with st.expander(f"{t['application']} – {t['ticket_id']}"):
-            st.write(f"**Reason:** {t.get('reason','')}")
-            st.write(f"**Created By:** {t.get('created_by','Unknown')}")
-            st.write(f"**Urgency:** {t.get('urgency', 'Normal')}")
-            st.write(f"**License Type:** {t.get('license_type','Unknown')}")
-            st.write(f"**Vendor:** {t.get('vendor','N/A')}")
-            st.write(f"**Infrastructure:** {t.get('infrastructure','N/A')}")
-
-            current_review = t["department_reviews"][dept_name]
+        base = bases[t["ticket_id"]]
+
+        with st.expander(f"{base['application']} – {base['ticket_id']}"):
+            st.write(f"**Reason:** {base.get('reason','')}")
+            st.write(f"**Created By:** {base.get('created_by','Unknown')}")
+            st.write(f"**Requests:** {base.get('request_count', 1)}")
+            st.write(f"**Urgency:** {base.get('urgency', 'Normal')}")
+            st.write(f"**License Type:** {base.get('license_type','Unknown')}")
+            st.write(f"**Vendor:** {base.get('vendor','N/A')}")
+            st.write(f"**Infrastructure:** {base.get('infrastructure','N/A')}")
+
+            current_review = (base.get("department_reviews") or {}).get(dept_name) or {}
             current_decision = current_review.get("decision")
             current_comment = current_review.get("comment", "")
 
@@ -42,26 +53,33 @@ def show_greylist_review(dept_name: str):
                 "Your decision:",
                 ["Approve", "Reject", "Need More Information"],
                 index=["Approve","Reject","Need More Information"].index(current_decision) if current_decision else 0,
-                key=f"{t['ticket_id']}_{dept_name}"
+                key=edit_widget_key(base, dept_name),
+                on_change=mark_edit_form_changed,
+                args=(t["ticket_id"],),
             )
 
             # Comment
             comment = st.text_area(
                 "Comment:",
                 value=current_comment,
-                key=f"{t['ticket_id']}_{dept_name}_comment"
+                key=edit_widget_key(base, f"{dept_name}_comment"),
+                on_change=mark_edit_form_changed,
+                args=(t["ticket_id"],),
             )
 
 
             if st.button("Submit", key=f"submit_{t['ticket_id']}_{dept_name}"):
+                base, working = checkout_edit(t["ticket_id"])
+
                 # Update department_reviews
-                t["department_reviews"][dept_name]["decision"] = decision
-                t["department_reviews"][dept_name]["comment"] = comment
+                review = working.setdefault("department_reviews", {}).setdefault(dept_name, {})
+                review["decision"] = decision
+                review["comment"] = comment
 
 
                 # Add history event
                 add_ticket_event(
-                    t,
+                    working,
                     action=f"{dept_name} review submitted",
                     actor=actor,
                     details={
@@ -71,5 +89,9 @@ def show_greylist_review(dept_name: str):
                     }
                 )
 
-                set_all_tickets(tickets)
-                st.success("✅ Decision & comment saved and history updated.")
+                try:
+                    commit_edit(working, base)
+                except TicketConflictError as e:
+                    st.error(f"❌ {e}. Please reload and review again.")
+                else:
+                    st.success("✅ Decision & comment saved and history updated.")
@@ -1,7 +1,13 @@
 # components/luy_engine.py
 import csv
+import hashlib
+import io
 import re
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 class LuyEngine:
     """
@@ -9,19 +15,64 @@ class LuyEngine:
     fully CSV-driven. BOM handling included.
     """
 
-    def __init__(self, csv_path):
+    # Tokens are what _match_score compares: \w+ runs of the lowercased text
+    TOKEN_RE = re.compile(r"\w+")
+
+    # "keyword": count of matched keywords (default, returns every name).
+    # "tfidf" / "bm25": weighted term matrix built at load time, returns only
+    # the top_k names with a positive score.
+    SCORING_MODES = ("keyword", "tfidf", "bm25")
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+
+    # classify_many only fans out to worker processes above this batch size
+    PARALLEL_MIN_BATCH = 5000
+
+    # Classification results kept per engine (LRU)
+    CACHE_SIZE = 4096
+
+    def __init__(self, csv_path, scoring="keyword", top_k=5, cache_size=CACHE_SIZE):
+        if scoring not in self.SCORING_MODES:
+            raise ValueError(f"Unknown scoring mode '{scoring}', must be one of {self.SCORING_MODES}")
         self.csv_path = csv_path
-        self.DOMAIN_KEYWORDS = {}
-        self.CAPABILITY_KEYWORDS = {}
-        self.PV_MAP = defaultdict(list)  # stores PV ids for domains/capabilities/pairs
+        self.scoring = scoring
+        self.top_k = top_k
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.load_csv()
 
+    def __getstate__(self):
+        # Worker processes of classify_many get the engine without its cache
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        del state["_cache_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache_lock = threading.Lock()
+
     # ---------------------------------------------------------
     # CSV Loader
     # ---------------------------------------------------------
     def load_csv(self):
-        """Load domains and capabilities from CSV with BOM handling."""
-        with open(self.csv_path, newline='', encoding='utf-8-sig') as csvfile:
+        """
+        Load domains and capabilities from CSV with BOM handling.
+        Reloading replaces the taxonomy and invalidates cached results.
+        """
+        with open(self.csv_path, "rb") as f:
+            data = f.read()
+        # Taxonomy version: part of every cache key
+        self.version = hashlib.sha1(data).hexdigest()[:12]
+
+        self.DOMAIN_KEYWORDS = {}
+        self.CAPABILITY_KEYWORDS = {}
+        self.PV_MAP = defaultdict(list)  # stores PV ids for domains/capabilities/pairs
+
+        with io.StringIO(data.decode("utf-8-sig"), newline="") as csvfile:
             reader = csv.DictReader(csvfile, delimiter=';')
 
             # Normalize headers (remove quotes, lowercase, strip)
@@ -61,6 +112,117 @@ class LuyEngine:
                     if pv_list:
                         self.PV_MAP[("domain", name)].extend(pv_list)
 
+        self.domain_index = self._build_index(self.DOMAIN_KEYWORDS)
+        self.capability_index = self._build_index(self.CAPABILITY_KEYWORDS)
+        self.domain_incidence = self._build_incidence(self.domain_index)
+        self.capability_incidence = self._build_incidence(self.capability_index)
+        if self.scoring != "keyword":
+            self.domain_matrix = self._build_matrix(self.DOMAIN_KEYWORDS)
+            self.capability_matrix = self._build_matrix(self.CAPABILITY_KEYWORDS)
+        self.clear_cache()
+
+    # ---------------------------------------------------------
+    # Inverted keyword index
+    # ---------------------------------------------------------
+    def _build_index(self, keyword_map):
+        """
+        Tokenize every keyword once.
+        Returns (names, postings) with postings: token -> [(name_idx, keyword_idx), ...].
+        A keyword counts once per name if any of its tokens is in the text,
+        exactly like _match_score.
+        """
+        names = list(keyword_map)
+        postings = defaultdict(list)
+        for name_idx, name in enumerate(names):
+            for kw_idx, kw in enumerate(keyword_map[name]):
+                for token in set(self.TOKEN_RE.findall(kw.lower())):
+                    postings[token].append((name_idx, kw_idx))
+        return names, dict(postings)
+
+    def _build_incidence(self, index):
+        """
+        Matrix form of the inverted index for batch scoring:
+        (vocabulary, token x keyword incidence, keyword x name ownership).
+        """
+        names, postings = index
+        vocabulary = {token: i for i, token in enumerate(postings)}
+        keyword_ids = {}
+        for token_postings in postings.values():
+            for key in token_postings:
+                keyword_ids.setdefault(key, len(keyword_ids))
+
+        incidence = np.zeros((len(vocabulary), len(keyword_ids)), dtype=np.float32)
+        for token, token_postings in postings.items():
+            for key in token_postings:
+                incidence[vocabulary[token], keyword_ids[key]] = 1
+
+        ownership = np.zeros((len(keyword_ids), len(names)), dtype=np.float32)
+        for (name_idx, _), kw_id in keyword_ids.items():
+            ownership[kw_id, name_idx] = 1
+        return vocabulary, incidence, ownership
+
+    def _index_scores(self, text, index):
+        """Scores for all names of the index, in index order."""
+        names, postings = index
+        matched = set()
+        for token in set(self.TOKEN_RE.findall(text.lower())):
+            matched.update(postings.get(token, ()))
+
+        scores = [0] * len(names)
+        for name_idx, _ in matched:
+            scores[name_idx] += 1
+        return list(zip(names, scores))
+
+    # ---------------------------------------------------------
+    # TF-IDF / BM25 term matrix
+    # ---------------------------------------------------------
+    def _build_matrix(self, keyword_map):
+        """
+        Returns (names, vocabulary, weights, query_idf): weights is a dense
+        (names x vocabulary) float64 matrix, so a query is scored with one
+        matrix-vector product. The taxonomy is small enough that a dense
+        matrix beats a sparse one.
+        """
+        names = list(keyword_map)
+        docs = [self.TOKEN_RE.findall(" ".join(keyword_map[n]).lower()) for n in names]
+        vocabulary = {}
+        for tokens in docs:
+            for token in tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+
+        tf = np.zeros((len(names), len(vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(docs):
+            np.add.at(tf[row], [vocabulary[t] for t in tokens], 1)
+
+        n_docs = max(len(names), 1)
+        df = np.count_nonzero(tf, axis=0)
+        if self.scoring == "bm25":
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+            doc_len = tf.sum(axis=1, keepdims=True)
+            avg_len = doc_len.mean() if len(names) else 1.0
+            norm = self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * doc_len / max(avg_len, 1e-9))
+            weights = idf * tf * (self.BM25_K1 + 1) / (tf + norm)
+            query_idf = None
+        else:
+            idf = np.log((1 + n_docs) / (1 + df)) + 1
+            weights = tf * idf
+            weights /= np.maximum(np.linalg.norm(weights, axis=1, keepdims=True), 1e-9)
+            query_idf = idf.astype(np.float32)
+
+        return names, vocabulary, weights.astype(np.float64), query_idf
+
+    def _query_vector(self, text, matrix):
+        _, vocabulary, _, query_idf = matrix
+        cols = [vocabulary[t] for t in self.TOKEN_RE.findall(text.lower()) if t in vocabulary]
+        if not cols:
+            return None
+        query = np.bincount(cols, minlength=len(vocabulary)).astype(np.float32)
+        if query_idf is None:
+            # BM25: each query term counts once
+            return np.minimum(query, 1)
+        query *= query_idf
+        return query / np.linalg.norm(query)
+
     # ---------------------------------------------------------
     # Utility
     # ---------------------------------------------------------
@@ -84,10 +246,10 @@ class LuyEngine:
     # ---------------------------------------------------------
     def get_domain_suggestions(self, software_name, description, use_case=""):
         text = self._clean(f"{software_name} {description} {use_case}")
-        scores = defaultdict(int)
-        for domain, keywords in self.DOMAIN_KEYWORDS.items():
-            scores[domain] = self._match_score(text, keywords)
-        sorted_results = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if self.scoring != "keyword":
+            return self._batch_matrix_scores([text], self.domain_matrix, "Unknown")[0]
+        scores = self._index_scores(text, self.domain_index)
+        sorted_results = sorted(scores, key=lambda x: x[1], reverse=True)
         return sorted_results if sorted_results else [("Unknown", 0)]
 
     # ---------------------------------------------------------
@@ -95,22 +257,177 @@ class LuyEngine:
     # ---------------------------------------------------------
     def get_capability_suggestions(self, software_name, description, use_case=""):
         text = self._clean(f"{software_name} {description} {use_case}")
-        scores = defaultdict(int)
-        for cap, keywords in self.CAPABILITY_KEYWORDS.items():
-            scores[cap] = self._match_score(text, keywords)
-        sorted_results = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if self.scoring != "keyword":
+            return self._batch_matrix_scores([text], self.capability_matrix, "Unspecified")[0]
+        scores = self._index_scores(text, self.capability_index)
+        sorted_results = sorted(scores, key=lambda x: x[1], reverse=True)
         return sorted_results if sorted_results else [("Unspecified", 0)]
 
+    # ---------------------------------------------------------
+    # Result cache
+    # ---------------------------------------------------------
+    def _cache_key(self, fields):
+        """Hash of the normalized (name, description, use_case) and the taxonomy version."""
+        normalized = "\x1f".join(" ".join(self._clean(f).split()) for f in fields)
+        return hashlib.sha1(f"{self.version}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+        return {"domains": list(result["domains"]), "capabilities": list(result["capabilities"])}
+
+    def _cache_put(self, key, result):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = {"domains": list(result["domains"]), "capabilities": list(result["capabilities"])}
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def cache_info(self):
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+            "maxsize": self.cache_size,
+            "version": self.version,
+        }
+
+    # ---------------------------------------------------------
+    # Batch classification
+    # ---------------------------------------------------------
+    def classify_many(self, records, workers=None):
+        """
+        Classify a batch in one matrix operation per taxonomy.
+
+        records: (software_name, description, use_case) tuples or dicts with
+        those keys. Returns classify_software() results in input order.
+        Cached results are reused; only misses are scored. Batches of at
+        least PARALLEL_MIN_BATCH misses are split over `workers` processes
+        if given.
+        """
+        fields = [self._record_fields(r) for r in records]
+        keys = [self._cache_key(f) for f in fields]
+        results = [self._cache_get(key) for key in keys]
+
+        # Each distinct input is scored once
+        missing = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(keys[i], fields[i])
+        if not missing:
+            return results
+
+        texts = [self._clean(" ".join(f)) for f in missing.values()]
+        if workers and workers > 1 and len(texts) >= self.PARALLEL_MIN_BATCH:
+            size = -(-len(texts) // workers)
+            chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                scored = [result for chunk in pool.map(self._classify_texts, chunks) for result in chunk]
+        else:
+            scored = self._classify_texts(texts)
+
+        by_key = dict(zip(missing, scored))
+        for key, result in by_key.items():
+            self._cache_put(key, result)
+        return [
+            result if result is not None else
+            {"domains": list(by_key[key]["domains"]), "capabilities": list(by_key[key]["capabilities"])}
+            for key, result in zip(keys, results)
+        ]
+
+    def _record_fields(self, record):
+        if isinstance(record, dict):
+            record = (
+                record.get("software_name", ""),
+                record.get("description", ""),
+                record.get("use_case", ""),
+            )
+        return tuple(str(f or "") for f in (tuple(record) + ("", "", ""))[:3])
+
+    def _classify_texts(self, texts):
+        tokens = [set(self.TOKEN_RE.findall(text.lower())) for text in texts]
+        if self.scoring == "keyword":
+            domains = self._batch_keyword_scores(tokens, self.domain_index, self.domain_incidence, "Unknown")
+            capabilities = self._batch_keyword_scores(tokens, self.capability_index, self.capability_incidence, "Unspecified")
+        else:
+            domains = self._batch_matrix_scores(texts, self.domain_matrix, "Unknown")
+            capabilities = self._batch_matrix_scores(texts, self.capability_matrix, "Unspecified")
+        return [{"domains": d, "capabilities": c} for d, c in zip(domains, capabilities)]
+
+    def _batch_keyword_scores(self, tokens, index, incidence, fallback):
+        """Same scores and order as _index_scores + stable sort, for all texts at once."""
+        names = index[0]
+        if not names:
+            return [[(fallback, 0)] for _ in tokens]
+
+        vocabulary, token_keyword, keyword_name = incidence
+        queries = np.zeros((len(tokens), len(vocabulary)), dtype=np.float32)
+        for row, text_tokens in enumerate(tokens):
+            cols = [vocabulary[t] for t in text_tokens if t in vocabulary]
+            queries[row, cols] = 1
+
+        matched = (queries @ token_keyword) > 0
+        scores = (matched.astype(np.float32) @ keyword_name).astype(np.int64)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        return [
+            [(names[i], row_scores[i]) for i in row_order]
+            for row_scores, row_order in zip(scores.tolist(), order.tolist())
+        ]
+
+    def _batch_matrix_scores(self, texts, matrix, fallback):
+        """Top-k (name, score) pairs with score > 0 per text, best first."""
+        names, vocabulary, weights, _ = matrix
+        queries = np.zeros((len(texts), len(vocabulary)), dtype=np.float64)
+        for row, text in enumerate(texts):
+            query = self._query_vector(text, matrix)
+            if query is not None:
+                queries[row] = query
+
+        # Rounded so batch size (BLAS summation order) cannot reorder ties
+        scores = np.round(queries @ weights.T, 9)
+        k = min(self.top_k, len(names))
+        results = []
+        for row_scores in scores:
+            if k == 0:
+                results.append([(fallback, 0)])
+                continue
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            # Ties keep CSV order, like the keyword scorer's stable sort
+            top = sorted(top, key=lambda i: (-row_scores[i], i))
+            results.append(
+                [(names[i], round(float(row_scores[i]), 4)) for i in top if row_scores[i] > 0]
+                or [(fallback, 0)]
+            )
+        return results
+
     # ---------------------------------------------------------
     # Main classification helper
     # ---------------------------------------------------------
     def classify_software(self, software_name, description, use_case=""):
+        key = self._cache_key((software_name or "", description or "", use_case or ""))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
         domains = self.get_domain_suggestions(software_name, description, use_case)
         capabilities = self.get_capability_suggestions(software_name, description, use_case)
-        return {
+        result = {
             "domains": domains,
             "capabilities": capabilities
         }
+        self._cache_put(key, result)
+        return result
 
     def get_pvs(self, domain: str = None, capability: str = None):
         """
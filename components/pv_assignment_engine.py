@@ -0,0 +1,179 @@
+# components/pv_assignment_engine.py
+import heapq
+from collections import Counter, deque
+
+
+class PVAssignmentEngine:
+    """
+    Balanced assignment of PV demands (one PV per ticket and PV role) to the
+    PVs eligible for the demand's (pv_role, domain).
+
+    Solved as a min-cost flow: source -> demand class (pv_role, domain) ->
+    PV -> sink, where the k-th assignment to a PV costs 2k+1 on top of its
+    current load (a quadratic load cost), so the optimum spreads work as
+    evenly as eligibility allows.
+    """
+
+    def __init__(self, pv_users):
+        self.pv_users = pv_users
+        self.build_index()
+
+    # ---------------------------------------------------------
+    # 1) INDEX
+    # ---------------------------------------------------------
+    def build_index(self):
+        """
+        index: (pv_role, domain) -> PVs. PVs covering the same set of
+        (pv_role, domain) pairs are interchangeable and share a group.
+        """
+        self.index = {}
+        signatures = {}
+        for username, profile in self.pv_users.items():
+            if not profile.get("active", True):
+                continue
+            keys = frozenset(
+                (role, domain)
+                for role in profile.get("pv_roles", [])
+                for domain in profile.get("domains", [])
+            )
+            for key in keys:
+                self.index.setdefault(key, []).append(username)
+            if keys:
+                signatures.setdefault(keys, []).append(username)
+
+        self.groups = list(signatures.items())
+        self.groups_by_key = {}
+        for g, (keys, _) in enumerate(self.groups):
+            for key in keys:
+                self.groups_by_key.setdefault(key, []).append(g)
+
+    def eligible_pvs(self, pv_role, domain):
+        return list(self.index.get((pv_role, domain), []))
+
+    # ---------------------------------------------------------
+    # 2) SOLVER
+    # ---------------------------------------------------------
+    def assign(self, demands, loads=None, unit_load=1.0):
+        """
+        demands: [(demand_id, pv_role, domain), ...]
+        loads: current annual load per PV, converted to assignments of
+        `unit_load` each.
+
+        Returns {demand_id: username or None}; None when no PV is eligible.
+        """
+        loads = loads or {}
+        unit_load = unit_load or 1.0
+
+        by_class = {}
+        for demand_id, role, domain in demands:
+            by_class.setdefault((role, domain), []).append(demand_id)
+        classes = [key for key in by_class if key in self.groups_by_key]
+        groups = sorted({g for key in classes for g in self.groups_by_key[key]})
+
+        # Current load in units per member of the groups involved
+        units = {
+            g: {pv: round(loads.get(pv, 0) / unit_load) for pv in self.groups[g][1]}
+            for g in groups
+        }
+
+        flow = self._level_flow(classes, [len(by_class[key]) for key in classes], groups, units)
+        return self._assign_members(demands, by_class, classes, flow, units)
+
+    def _level_flow(self, classes, supply, groups, units):
+        """
+        Min-cost flow for the quadratic load cost, solved level by level:
+        PVs may take units up to load level T, the max flow is augmented
+        (Dinic) and T is raised until every demand is placed. Sink arcs only
+        ever gain flow, so each level keeps the most units at or below it,
+        which is the optimum for any convex cost shared by all PVs.
+
+        Returns {(class, group): units}.
+        """
+        C, G = len(classes), len(groups)
+        source, sink = 0, C + G + 1
+        graph = [[] for _ in range(C + G + 2)]  # node -> [edge ids]
+        to, cap = [], []
+
+        def add_edge(u, v, c):
+            graph[u].append(len(to)); to.append(v); cap.append(c)
+            graph[v].append(len(to)); to.append(u); cap.append(0)
+            return len(to) - 2
+
+        group_node = {g: C + 1 + i for i, g in enumerate(groups)}
+        pair_edges = {}
+        for c, key in enumerate(classes):
+            add_edge(source, c + 1, supply[c])
+            for g in self.groups_by_key[key]:
+                pair_edges[(c, g)] = add_edge(c + 1, group_node[g], sum(supply))
+        sink_edges = {g: add_edge(group_node[g], sink, 0) for g in groups}
+
+        # Members per group by current level, to open capacity level by level
+        level_counts = {g: Counter(units[g].values()) for g in groups}
+        remaining = sum(supply)
+        level = min((min(u.values()) for u in units.values()), default=0)
+        while remaining:
+            for g in groups:
+                # Every member at or below `level` may take one more unit
+                cap[sink_edges[g]] += sum(n for l, n in level_counts[g].items() if l <= level)
+            remaining -= self._max_flow(graph, to, cap, source, sink)
+            level += 1
+
+        return {pair: cap[edge ^ 1] for pair, edge in pair_edges.items() if cap[edge ^ 1]}
+
+    def _max_flow(self, graph, to, cap, source, sink):
+        """Dinic: augment along blocking flows of the BFS level graph."""
+        total = 0
+        while True:
+            depth = [-1] * len(graph)
+            depth[source] = 0
+            queue = deque([source])
+            while queue:
+                u = queue.popleft()
+                for e in graph[u]:
+                    if cap[e] and depth[to[e]] < 0:
+                        depth[to[e]] = depth[u] + 1
+                        queue.append(to[e])
+            if depth[sink] < 0:
+                return total
+
+            pointer = [0] * len(graph)
+
+            def push(u, limit):
+                if u == sink:
+                    return limit
+                edges = graph[u]
+                while pointer[u] < len(edges):
+                    e = edges[pointer[u]]
+                    v = to[e]
+                    if cap[e] and depth[v] == depth[u] + 1:
+                        pushed = push(v, min(limit, cap[e]))
+                        if pushed:
+                            cap[e] -= pushed
+                            cap[e ^ 1] += pushed
+                            return pushed
+                    pointer[u] += 1
+                return 0
+
+            while True:
+                pushed = push(source, float("inf"))
+                if not pushed:
+                    break
+                total += pushed
+
+    def _assign_members(self, demands, by_class, classes, flow, units):
+        """Hand each group's units to its least loaded members, one at a time."""
+        heaps = {}
+        result = {demand_id: None for demand_id, _, _ in demands}
+        for c, key in enumerate(classes):
+            pending = iter(by_class[key])
+            for g in self.groups_by_key[key]:
+                amount = flow.get((c, g), 0)
+                if g not in heaps:
+                    heaps[g] = [(u, pv) for pv, u in units[g].items()]
+                    heapq.heapify(heaps[g])
+                heap = heaps[g]
+                for _ in range(amount):
+                    u, pv = heapq.heappop(heap)
+                    heapq.heappush(heap, (u + 1, pv))
+                    result[next(pending)] = pv
+        return result
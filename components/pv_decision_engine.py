@@ -0,0 +1,261 @@
+# components/pv_decision_engine.py
+import functools
+import itertools
+
+import numpy as np
+import yaml
+
+
+class PVDecisionEngine:
+    """
+    PV eligibility, level and scenario inference from components/pv_rules.yaml.
+
+    The rules are compiled into NumPy decision tables indexed by the codes of
+    the declared input values; evaluate() is a pure function of the context.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, rules_path="components/pv_rules.yaml"):
+        self.rules_path = rules_path
+        self.load_rules()
+
+    # ---------------------------------------------------------
+    # 1) RULE LOADING & COMPILATION
+    # ---------------------------------------------------------
+    def load_rules(self):
+        with open(self.rules_path, encoding="utf-8") as f:
+            rules = yaml.safe_load(f)
+
+        self.inputs = {
+            field: {"values": list(spec["values"]), "default": spec["default"]}
+            for field, spec in rules["inputs"].items()
+        }
+        self.fields = list(self.inputs)
+        self.codes = {
+            field: {value: i for i, value in enumerate(spec["values"])}
+            for field, spec in self.inputs.items()
+        }
+
+        eligibility = rules["eligibility"]
+        self._baseline = [
+            (set(r["tool_types"]), self._compile_condition(r), r["reason"])
+            for r in eligibility["tool_type_baseline"]
+        ]
+        self._risk = [(self._compile_condition(r), r["reason"]) for r in eligibility["risk"]]
+        shortcut = eligibility["not_required_without_reasons"]
+        self._shortcut = (self._compile_condition(shortcut), shortcut["reason"])
+
+        level = rules["level"]
+        self.levels = list(level["levels"])
+        self._base_level = level["base"]
+        self._bumps = [(self._compile_condition(b), b["steps"]) for b in level["bumps"]]
+        self._max_level = level["max_by_tool_type"]
+        self._default_max_level = level["default_max"]
+
+        scenario = rules["scenario"]
+        self._default_scenario = scenario["default"]
+        self._scenario_rules = [(self._compile_condition(r), r["scenario"]) for r in scenario["rules"]]
+        self.scenarios = list(dict.fromkeys([self._default_scenario] + [s for _, s in self._scenario_rules]))
+
+        self._compile_tables(rules)
+        self._evaluate_key = functools.lru_cache(maxsize=self.CACHE_SIZE)(self._evaluate_key_uncached)
+
+    def _compile_condition(self, rule):
+        """Return (predicate(context), referenced fields)."""
+        when = rule.get("when") or {}
+        when_any = rule.get("when_any") or []
+        for field in list(when) + list(when_any):
+            if field not in self.inputs:
+                raise ValueError(f"Rule references undeclared input '{field}'")
+
+        checks = []
+        for field, expected in when.items():
+            if isinstance(expected, bool):
+                checks.append(lambda ctx, f=field, e=expected: bool(ctx[f]) == e)
+            else:
+                allowed = frozenset(expected)
+                checks.append(lambda ctx, f=field, a=allowed: ctx[f] in a)
+
+        def predicate(ctx):
+            if when_any and not any(ctx[f] for f in when_any):
+                return False
+            return all(check(ctx) for check in checks)
+
+        return predicate, set(when) | set(when_any)
+
+    def _compile_tables(self, rules):
+        """
+        One table per decision over only the inputs it depends on:
+        table[code_1, ..., code_n] -> result index.
+        """
+        eligibility_fields = {"tool_type", "product_type"}
+        for _, (_, fields), _ in self._baseline:
+            eligibility_fields |= fields
+        for (_, fields), _ in self._risk:
+            eligibility_fields |= fields
+        eligibility_fields |= self._shortcut[0][1]
+
+        level_fields = {self._base_level["field"], "tool_type"}
+        for (_, fields), _ in self._bumps:
+            level_fields |= fields
+
+        scenario_fields = set()
+        for (_, fields), _ in self._scenario_rules:
+            scenario_fields |= fields
+
+        self.eligibility_results = []
+        self.tables = {
+            "eligibility": self._build_table(eligibility_fields, self._decide_eligibility, self.eligibility_results),
+            "level": self._build_table(level_fields, self._infer_level, self.levels),
+            "scenario": self._build_table(scenario_fields, self._infer_scenario, self.scenarios),
+        }
+
+    def _build_table(self, fields, decide, results):
+        fields = [f for f in self.fields if f in fields]
+        values = [self.inputs[f]["values"] for f in fields]
+        table = np.zeros([len(v) for v in values], dtype=np.int16)
+
+        result_index = {r: i for i, r in enumerate(results)}
+        context = self.default_context()
+        for codes in itertools.product(*(range(len(v)) for v in values)):
+            for field, vals, code in zip(fields, values, codes):
+                context[field] = vals[code]
+            result = decide(context)
+            if result not in result_index:
+                result_index[result] = len(results)
+                results.append(result)
+            table[codes] = result_index[result]
+        return fields, table
+
+    # ---------------------------------------------------------
+    # 2) RULES (used to fill the tables and for undeclared values)
+    # ---------------------------------------------------------
+    def _decide_eligibility(self, ctx):
+        reasons = []
+        for tool_types, (condition, _), reason in self._baseline:
+            if ctx["tool_type"] in tool_types:
+                if condition(ctx):
+                    reasons.append(reason.format(**ctx))
+                break
+
+        for (condition, _), reason in self._risk:
+            if condition(ctx):
+                reasons.append(reason)
+
+        (condition, _), reason = self._shortcut
+        if not reasons and condition(ctx):
+            return False, (reason,)
+        return len(reasons) > 0, tuple(reasons)
+
+    def _infer_level(self, ctx):
+        top = len(self.levels) - 1
+        base = self._base_level["map"].get(ctx[self._base_level["field"]], self._base_level["default"])
+        idx = self.levels.index(base)
+        for (condition, _), steps in self._bumps:
+            if condition(ctx):
+                idx = min(idx + steps, top)
+
+        max_idx = self.levels.index(self._max_level.get(ctx["tool_type"], self._default_max_level))
+        return self.levels[min(idx, max_idx)]
+
+    def _infer_scenario(self, ctx):
+        for (condition, _), scenario in self._scenario_rules:
+            if condition(ctx):
+                return scenario
+        return self._default_scenario
+
+    # ---------------------------------------------------------
+    # 3) EVALUATION
+    # ---------------------------------------------------------
+    def default_context(self):
+        return {field: spec["default"] for field, spec in self.inputs.items()}
+
+    def normalize_context(self, context):
+        """Declared inputs only, defaults for missing ones, booleans as bool."""
+        ctx = self.default_context()
+        for field in self.fields:
+            value = context.get(field)
+            if value is None:
+                continue
+            ctx[field] = bool(value) if isinstance(self.inputs[field]["default"], bool) else value
+        return ctx
+
+    def evaluate(self, context):
+        """
+        {"pv_required", "eligibility_reasons", "level", "scenario"} for a
+        context dict; results are cached per normalized context.
+        """
+        ctx = self.normalize_context(context)
+        pv_required, reasons, level, scenario = self._evaluate_key(tuple(ctx[f] for f in self.fields))
+        return {
+            "pv_required": pv_required,
+            "eligibility_reasons": list(reasons),
+            "level": level,
+            "scenario": scenario,
+        }
+
+    def evaluate_many(self, contexts):
+        return [self.evaluate(c) for c in contexts]
+
+    def evaluate_grid(self, context, variations):
+        """
+        Evaluate every combination of `variations` ({field: [values]}) on top
+        of `context` with one indexed read per decision table.
+
+        Returns flat arrays in row-major order of the variations: "axes" holds
+        the value index per varied field, "eligibility" / "level" / "scenario"
+        index into eligibility_results / levels / scenarios.
+        """
+        ctx = self.normalize_context(context)
+        varied = list(variations)
+        shape = [len(variations[f]) for f in varied]
+
+        codes = {}
+        for field in self.fields:
+            try:
+                if field in variations:
+                    axis = varied.index(field)
+                    codes[field] = np.array(
+                        [self.codes[field][v] for v in variations[field]]
+                    ).reshape([-1 if i == axis else 1 for i in range(len(varied))])
+                else:
+                    codes[field] = self.codes[field][ctx[field]]
+            except (KeyError, TypeError):
+                raise ValueError(f"Grid values for '{field}' must be declared in {self.rules_path}")
+
+        def lookup(name):
+            fields, table = self.tables[name]
+            return np.broadcast_to(table[tuple(codes[f] for f in fields)], shape).ravel()
+
+        eligibility = lookup("eligibility")
+        required = np.array([r[0] for r in self.eligibility_results], dtype=bool)
+        return {
+            "fields": varied,
+            "axes": np.indices(shape).reshape(len(varied), -1).T,
+            "pv_required": required[eligibility],
+            "eligibility": eligibility,
+            "level": lookup("level"),
+            "scenario": lookup("scenario"),
+        }
+
+    def _evaluate_key_uncached(self, key):
+        ctx = dict(zip(self.fields, key))
+        try:
+            codes = {f: self.codes[f][ctx[f]] for f in self.fields}
+        except (KeyError, TypeError):
+            # Value outside the declared inputs: evaluate the rules directly
+            pv_required, reasons = self._decide_eligibility(ctx)
+            return pv_required, reasons, self._infer_level(ctx), self._infer_scenario(ctx)
+
+        def lookup(name):
+            fields, table = self.tables[name]
+            return int(table[tuple(codes[f] for f in fields)])
+
+        pv_required, reasons = self.eligibility_results[lookup("eligibility")]
+        return (
+            pv_required,
+            reasons,
+            self.levels[lookup("level")],
+            self.scenarios[lookup("scenario")],
+        )
@@ -1,4 +1,8 @@
 import csv
+import hashlib
+import io
+
+import numpy as np
 
 class PVEngine:
     """
@@ -32,16 +36,47 @@ class PVEngine:
         "Asset-, Vertrags- und Lizenzmanagement (in Zusammenarbeit mit dem zentralen AVL-Management)": 2,
     }
 
+    PRODUCT_TYPES = ["Fremdsoftware", "Eigenentwicklung", "Hardware"]
+
+    # Processes per scenario; any other scenario keeps all processes
+    SCENARIO_MAP = {
+        "Neueinführung": [
+            "Lifecyclemanagement",
+            "Produktmanagement",
+            "Einführung und Dokumentation",
+        ],
+        "Maintenance": [
+            "Incident Management",
+            "Problem Management",
+            "Change Management",
+        ],
+        "Incident": ["Incident Management"],
+        "Security relevant": [
+            "Informationssicherheits- und Informationsrisikomanagement"
+        ],
+        "Release Upgrade": [
+            "Releasemanagement",
+            "Change Management",
+        ],
+    }
+
     def __init__(self, csv_path="components/pv_journey.csv"):
         self.csv_path = csv_path
         self.tasks = self.load_tasks()
+        self._encode_columns()
+        self.lookup = self._build_lookup()
 
     # ---------------------------------------------------------
     # 1) CSV LOADING
     # ---------------------------------------------------------
     def load_tasks(self):
+        with open(self.csv_path, "rb") as f:
+            data = f.read()
+        # Catalog version: recorded in derived obligations to detect stale ones
+        self.version = hashlib.sha1(data).hexdigest()[:12]
+
         tasks = []
-        with open(self.csv_path, newline="", encoding="utf-8-sig") as f:
+        with io.StringIO(data.decode("utf-8-sig"), newline="") as f:
             reader = csv.DictReader(f, delimiter=';')
 
             # Normalize headers
@@ -76,11 +111,76 @@ class PVEngine:
    
 
 
+    # ---------------------------------------------------------
+    # 1b) COLUMN ENCODING
+    # ---------------------------------------------------------
+    def _encode_columns(self):
+        """
+        Encode the task table as NumPy columns so filtering is boolean masking:
+        relevanz_bits (bit per PRODUCT_TYPES entry), process_codes / frequency_codes
+        (index into self.processes / self.frequencies) and min_level.
+        Tasks are also pre-sorted by process and frequency (stable, CSV order
+        inside a group) with the start offset of every group.
+        """
+        n = len(self.tasks)
+        self._task_pos = {id(t): i for i, t in enumerate(self.tasks)}
+
+        self.relevanz_bits = np.zeros(n, dtype=np.uint8)
+        for i, t in enumerate(self.tasks):
+            for product_type in t["relevanz"]:
+                if product_type in self.PRODUCT_TYPES:
+                    self.relevanz_bits[i] |= 1 << self.PRODUCT_TYPES.index(product_type)
+
+        self.processes, self.process_codes, self.process_order, self.process_offsets = self._encode_groups("prozess")
+        self.frequencies, self.frequency_codes, self.frequency_order, self.frequency_offsets = self._encode_groups("häufigkeit")
+
+        # scenario -> allowed flag per process code
+        self.scenario_processes = {
+            scenario: np.array([p in allowed for p in self.processes], dtype=bool)
+            for scenario, allowed in self.SCENARIO_MAP.items()
+        }
+
+        self.min_level = np.array(
+            [self.PROCESS_MIN_LEVEL.get(p, 0) for p in self.processes], dtype=np.int8
+        )[self.process_codes] if n else np.zeros(0, dtype=np.int8)
+
+    def _encode_groups(self, field):
+        """(sorted labels, code per task, task order grouped by label, group start offsets)"""
+        labels = sorted({t[field] for t in self.tasks})
+        code_of = {label: i for i, label in enumerate(labels)}
+        codes = np.array([code_of[t[field]] for t in self.tasks], dtype=np.int32)
+        order = np.argsort(codes, kind="stable")
+        offsets = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        return labels, codes, order, offsets
+
+    def task_mask(self, product_type, scenario, level):
+        """Boolean mask over self.tasks for a product type, scenario and level."""
+        if product_type not in self.PRODUCT_TYPES:
+            raise ValueError(f"Invalid product_type: {product_type}")
+        if level not in self.LEVELS:
+            raise ValueError(f"Invalid level: {level}")
+
+        mask = (self.relevanz_bits & (1 << self.PRODUCT_TYPES.index(product_type))) != 0
+        if self.SCENARIO_MAP.get(scenario):
+            mask &= self.scenario_processes[scenario][self.process_codes]
+        mask &= self.min_level <= self.LEVELS[level]
+        return mask
+
+    def _masked_groups(self, mask, labels, order, offsets):
+        """((label, task indices), ...) for the masked tasks, in label order."""
+        groups = []
+        for g, label in enumerate(labels):
+            members = order[offsets[g]:offsets[g + 1]]
+            members = members[mask[members]]
+            if members.size:
+                groups.append((label, members))
+        return groups
+
     # ---------------------------------------------------------
     # 2) PRODUCT TYPE FILTERING (using relevanz)
     # ---------------------------------------------------------
     def filter_by_product_type(self, tasks, product_type):
-        if product_type not in ["Fremdsoftware", "Eigenentwicklung", "Hardware"]:
+        if product_type not in self.PRODUCT_TYPES:
             raise ValueError(f"Invalid product_type: {product_type}")
 
         return [t for t in tasks if product_type in t["relevanz"]]
@@ -89,28 +189,7 @@ class PVEngine:
     # 3) SCENARIO FILTERING
     # ---------------------------------------------------------
     def filter_by_scenario(self, tasks, scenario):
-        SCENARIO_MAP = {
-            "Neueinführung": [
-                "Lifecyclemanagement",
-                "Produktmanagement",
-                "Einführung und Dokumentation",
-            ],
-            "Maintenance": [
-                "Incident Management",
-                "Problem Management",
-                "Change Management",
-            ],
-            "Incident": ["Incident Management"],
-            "Security relevant": [
-                "Informationssicherheits- und Informationsrisikomanagement"
-            ],
-            "Release Upgrade": [
-                "Releasemanagement",
-                "Change Management",
-            ],
-        }
-
-        allowed_processes = SCENARIO_MAP.get(scenario)
+        allowed_processes = self.SCENARIO_MAP.get(scenario)
         if not allowed_processes:
             return tasks
 
@@ -127,25 +206,139 @@ class PVEngine:
         return [t for t in tasks if level_value >= self.PROCESS_MIN_LEVEL.get(t["prozess"], 0)]
 
     # ---------------------------------------------------------
-    # 5) HIGH-LEVEL ENTRY FUNCTION
+    # 5) PRECOMPUTED LOOKUP
+    # ---------------------------------------------------------
+    def _build_lookup(self):
+        """
+        Evaluate every (product_type, scenario, level) once via task_mask.
+        Scenario None stands for every scenario without a process mapping.
+        Values: (tasks sorted by process, ((process, tasks), ...)).
+        """
+        lookup = {}
+        for product_type in self.PRODUCT_TYPES:
+            for scenario in [None, *self.SCENARIO_MAP]:
+                for level in self.LEVELS:
+                    mask = self.task_mask(product_type, scenario, level)
+                    groups = tuple(
+                        (process, tuple(self.tasks[i] for i in members))
+                        for process, members in self._masked_groups(
+                            mask, self.processes, self.process_order, self.process_offsets
+                        )
+                    )
+                    result = tuple(t for _, tasks in groups for t in tasks)
+                    lookup[(product_type, scenario, level)] = (result, groups)
+        # group_by_process on a lookup result returns its precomputed groups
+        self._result_groups = {id(result): groups for result, groups in lookup.values()}
+        return lookup
+
+    def _lookup(self, product_type, scenario, level):
+        if product_type not in self.PRODUCT_TYPES:
+            raise ValueError(f"Invalid product_type: {product_type}")
+        if level not in self.LEVELS:
+            raise ValueError(f"Invalid level: {level}")
+        if scenario not in self.SCENARIO_MAP:
+            scenario = None
+        return self.lookup[(product_type, scenario, level)]
+
+    # ---------------------------------------------------------
+    # 6) HIGH-LEVEL ENTRY FUNCTION
     # ---------------------------------------------------------
     def get_pv_responsibilities(self, product_type, scenario, level="L2"):
-        result = self.filter_by_product_type(self.tasks, product_type)
-        result = self.filter_by_scenario(result, scenario)
-        result = self.filter_by_level(result, level)
-        return sorted(result, key=lambda x: x["prozess"])
+        """
+        Tasks sorted by process, as a tuple shared between callers:
+        copy the task dicts before storing or modifying them.
+        """
+        return self._lookup(product_type, scenario, level)[0]
+
+    def get_pv_responsibilities_by_process(self, product_type, scenario, level="L2"):
+        """((process, tasks), ...) in process order, precomputed like get_pv_responsibilities."""
+        return self._lookup(product_type, scenario, level)[1]
 
     # ---------------------------------------------------------
-    # 6) UTILITIES
+    # 7) UTILITIES
     # ---------------------------------------------------------
     def group_by_process(self, tasks):
-        grouped = {}
-        for t in tasks:
-            grouped.setdefault(t["prozess"], []).append(t)
-        return grouped
+        groups = self._result_groups.get(id(tasks))
+        if groups is not None and isinstance(tasks, tuple):
+            return {process: list(ts) for process, ts in groups}
+        return self._group(tasks, "prozess", self.processes, self.process_order, self.process_offsets)
 
     def group_by_frequency(self, tasks):
-        grouped = {}
-        for t in tasks:
-            grouped.setdefault(t["häufigkeit"], []).append(t)
-        return grouped
+        return self._group(tasks, "häufigkeit", self.frequencies, self.frequency_order, self.frequency_offsets)
+
+    def _group(self, tasks, field, labels, order, offsets):
+        """
+        Group tasks by field, keeping input order inside a group and ordering
+        groups by first appearance. Engine tasks use the precomputed group
+        offsets; other task dicts fall back to building the dict.
+        """
+        positions = [self._task_pos.get(id(t)) for t in tasks]
+        if None in positions or len(set(positions)) != len(positions):
+            grouped = {}
+            for t in tasks:
+                grouped.setdefault(t[field], []).append(t)
+            return grouped
+
+        positions = np.array(positions, dtype=np.int64)
+        mask = np.zeros(len(self.tasks), dtype=bool)
+        mask[positions] = True
+        input_rank = np.empty(len(self.tasks), dtype=np.int64)
+        input_rank[positions] = np.arange(len(positions))
+
+        groups = []
+        for label, members in self._masked_groups(mask, labels, order, offsets):
+            ranks = input_rank[members]
+            members = members[np.argsort(ranks, kind="stable")]
+            groups.append((ranks.min(), label, members))
+        groups.sort(key=lambda g: g[0])
+        return {label: [self.tasks[i] for i in members] for _, label, members in groups}
+
+    # ---------------------------------------------------------
+    # 8) CATALOG DIFF
+    # ---------------------------------------------------------
+    @staticmethod
+    def task_key(task):
+        return (task["pv"], task["aufgabe"], task["prozess"])
+
+    @classmethod
+    def diff_tasks(cls, old_tasks, new_tasks):
+        """
+        Changes between two task lists by (pv, aufgabe, prozess):
+        {"added": [...], "removed": [...], "changed": [...]} of task keys;
+        "changed" means häufigkeit or relevanz differ.
+        """
+        old = {cls.task_key(t): t for t in old_tasks}
+        new = {cls.task_key(t): t for t in new_tasks}
+        return {
+            "added": [k for k in new if k not in old],
+            "removed": [k for k in old if k not in new],
+            "changed": [
+                k for k in new
+                if k in old and (
+                    new[k]["häufigkeit"] != old[k]["häufigkeit"]
+                    or list(new[k]["relevanz"]) != list(old[k]["relevanz"])
+                )
+            ],
+        }
+
+    def diff(self, other):
+        """Catalog changes from an older engine `other` to this one."""
+        return self.diff_tasks(other.tasks, self.tasks)
+
+    def affected_keys(self, other):
+        """
+        (product_type, scenario, level) keys whose responsibilities differ
+        between an older engine `other` and this one.
+        """
+        def signature(tasks):
+            return [(self.task_key(t), t["häufigkeit"], tuple(t["relevanz"])) for t in tasks]
+
+        return {
+            key for key, (tasks, _) in self.lookup.items()
+            if key not in other.lookup or signature(tasks) != signature(other.lookup[key][0])
+        }
+
+    @classmethod
+    def lookup_key(cls, product_type, scenario, level):
+        """Key into self.lookup; unmapped scenarios share the None entry."""
+        return (product_type, scenario if scenario in cls.SCENARIO_MAP else None, level)
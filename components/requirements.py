@@ -1,5 +1,5 @@
 import streamlit as st
-from state.requirements import add_requirement_event, save_requirement
+from state.requirements import add_requirement_event, init_requirement_store, register_requirements
 
 # -----------------------------
 # Configuration
@@ -11,23 +11,20 @@ LIFECYCLE_STATES = ["Proposed", "In Progress", "Completed", "Reviewed"]
 # Ensure requirement exists
 # -----------------------------
 
+def new_requirement(req_id, title, section, req_type, actor):
+    return {
+        "id": req_id,
+        "page": st.session_state.get("device_current_page", "unknown_page"),
+        "title": title,
+        "section": section,
+        "type": req_type,
+        "status": DEFAULT_STATUS,
+        "actor": actor,
+        "history": []
+    }
+
 def ensure_requirement(req_id, title, section, req_type, actor):
-    if "requirements" not in st.session_state:
-        st.session_state.requirements = {}
-
-    if req_id not in st.session_state.requirements:
-        req = {
-            "id": req_id,
-            "title": title,
-            "section": section,
-            "type": req_type,
-            "status": DEFAULT_STATUS,
-            "actor": actor,
-            "history": []
-        }
-
-        st.session_state.requirements[req_id] = req
-        save_requirement(req)   # 🔥 persist immediately
+    register_requirements([new_requirement(req_id, title, section, req_type, actor)])
 
 # -----------------------------
 # Main UI
@@ -49,17 +46,23 @@ def show_requirements(section_title, items, req_type="question", expanded=False)
     ):
         st.caption(captions.get(req_type, ""))
 
-        for idx, item in enumerate(items):
-            req_id = f"{page_name}_{section_title.replace(' ','_')}_{req_type}_{idx+1}"
-
-            ensure_requirement(
-                req_id=req_id,
-                title=item,
-                section=section_title,
-                req_type=req_type,
-                actor=actor
-            )
-
+        # Register unseen requirements of this section in one batch;
+        # already known IDs cost a dict lookup, no disk access
+        init_requirement_store()
+        req_ids = [
+            f"{page_name}_{section_title.replace(' ','_')}_{req_type}_{idx+1}"
+            for idx in range(len(items))
+        ]
+        known = st.session_state.requirements
+        missing = [
+            new_requirement(req_id, item, section_title, req_type, actor)
+            for req_id, item in zip(req_ids, items)
+            if req_id not in known
+        ]
+        if missing:
+            register_requirements(missing)
+
+        for req_id, item in zip(req_ids, items):
             req = st.session_state.requirements[req_id]
 
             # Initialize last-known status ONCE
@@ -110,8 +113,6 @@ def show_requirements(section_title, items, req_type="question", expanded=False)
                             }
                         )
 
-                        save_requirement(req)
-
                         st.session_state[last_status_key] = status
                         st.session_state.pop(comment_key, None)
 
@@ -1,4 +1,4 @@
-from datetime import datetime
+from state.tickets import add_ticket_event as _add_ticket_event
 
 def add_ticket_event(
     ticket: dict,
@@ -10,6 +10,9 @@ def add_ticket_event(
     """
     Append a decision/event to a ticket's history.
 
+    Kept for older pages; delegates to state.tickets.add_ticket_event, so the
+    status update is validated against the ticket lifecycle.
+
     Parameters:
     - ticket: the ticket dict to update
     - action: short description (e.g. 'IS-P Review Completed')
@@ -17,24 +20,7 @@ def add_ticket_event(
     - details: optional dict with structured info
     - new_status: optional status update for the ticket
     """
-
-    # Ensure history exists
-    ticket.setdefault("history", [])
-
-    # Create event
-    event = {
-        "timestamp": datetime.now().isoformat(),
-        "actor": actor,
-        "action": action,
-        "details": details or {},
-    }
-
-    # Append event
-    ticket["history"].append(event)
-
-    # Optionally update ticket status
-    if new_status:
-        ticket["status"] = new_status
+    return _add_ticket_event(ticket, action, actor=actor, details=details, status=new_status)
 
 
 def sync_department_reviews_from_history(ticket: dict):
@@ -45,6 +31,11 @@ def sync_department_reviews_from_history(ticket: dict):
     """
     ticket.setdefault("department_reviews", {})
 
+    # Rebuilt from scratch so repeated calls do not duplicate entries
+    for review in ticket["department_reviews"].values():
+        if isinstance(review, dict):
+            review["history"] = []
+
     for event in ticket.get("history", []):
         details = event.get("details", {})
         department = details.get("department")
@@ -54,6 +54,8 @@ def load_navigation():
                 st.Page("pages/5_shop_artikel.py", title="[F]Shop Artikel"),
                 # After Ersteeinschätzung we do deeper analysis of software, check with architecture team, security team, license team
                 st.Page("pages/8_approval_required.py", title="[F]Approval Required"),
+                # Existing requests from the legacy ITSM are migrated in bulk instead of one by one
+                st.Page("pages/23_ticket_import.py", title="[F]Legacy Ticket Import"),
                 # We communicate wiht customer that it is in freigabe process 
                 # We inform customer about decision
             ],
@@ -78,7 +80,9 @@ def load_navigation():
                 st.Page("pages/12_backend_mpi.py", title="[F]MPI check"),
             ],
             "PV-Responsibilities" : [
-                st.Page("pages/22_PV_context_mapping.py",title="[F]PV context Mapping")
+                st.Page("pages/22_PV_context_mapping.py",title="[F]PV context Mapping"),
+                # How much recurring PV work each PV carries across approved tickets
+                st.Page("pages/24_pv_workload.py",title="[F]PV Workload"),
             ],
             "Others" : [
                 st.Page("pages/requirements_overview.py",title="[E]Project Requirements"),
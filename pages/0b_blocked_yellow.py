@@ -2,7 +2,7 @@ import streamlit as st
 from components.requirements import show_requirements
 from components.ticket_history import add_ticket_event
 from state.permissions import require_system
-from state.tickets import create_ticket
+from state.tickets import create_or_join_ticket
 from state.luy import get_current_luy_app
 from state.epm_lists import find_epm_entry
 
@@ -89,7 +89,7 @@ if submit:
     if not user_reason.strip():
         st.error("Please provide a justification.")
     else:
-        ticket = create_ticket(
+        ticket, joined = create_or_join_ticket(
             source="EPM Scanner Yellow",
             application=app_name,
             reason=user_reason,
@@ -102,20 +102,26 @@ if submit:
             }
         )
 
-        # ✅ ADD HISTORY EVENT
-        add_ticket_event(
-            ticket,
-            action="Whitelist Request Submitted",
-            actor=username,
-            details={
-                "source": "EPM Scanner Yellow",
-                "application": app_name,
-                "justification": user_reason,
-                "epm_category": epm_entry.get("Category") if epm_entry else None,
-                "epm_policy": epm_entry.get("Policy") if epm_entry else None,
-            },
-            new_status="Submitted for Review",
-        )
+        if joined:
+            st.info(
+                f"An open request for **{app_name}** already exists. "
+                f"You have been added to it ({ticket['request_count']} requests so far)."
+            )
+        else:
+            # ✅ ADD HISTORY EVENT
+            add_ticket_event(
+                ticket,
+                action="Whitelist Request Submitted",
+                actor=username,
+                details={
+                    "source": "EPM Scanner Yellow",
+                    "application": app_name,
+                    "justification": user_reason,
+                    "epm_category": epm_entry.get("Category") if epm_entry else None,
+                    "epm_policy": epm_entry.get("Policy") if epm_entry else None,
+                },
+                new_status="Submitted for Review",
+            )
 
         st.session_state.latest_ticket = ticket
         st.success("✅ Whitelist request sent successfully.")
@@ -2,11 +2,12 @@ import streamlit as st
 from datetime import datetime
 from urllib.parse import quote
 from state.permissions import require_system
-from state.tickets import create_ticket
+from state.tickets import create_or_join_ticket
 from components.requirements import show_requirements
 from components.ticket_history import add_ticket_event
 from state.luy import get_current_luy_app
 from state.epm_lists import find_epm_entry
+from state.ticket_lifecycle import INTAKE_STATUSES
 
 
 
@@ -87,7 +88,7 @@ with col1:
         if not reason.strip():
             st.error("A justification is required.")
         else:
-            ticket = create_ticket(
+            ticket, joined = create_or_join_ticket(
                 source="EPM Scanner Red",
                 application=app_name,
                 reason=reason,
@@ -102,21 +103,27 @@ with col1:
                 created_by=username
             )
 
-            # ✅ ADD TICKET HISTORY EVENT
-            add_ticket_event(
-                ticket,
-                action="Red Scanner Whitelist Request Submitted",
-                actor=username,
-                details={
-                    "application": app_name,
-                    "reason": reason,
-                    "epm_category": epm_entry.get("Category") if epm_entry else None,
-                    "epm_policy": epm_entry.get("Policy") if epm_entry else None,
-                    "executable_path": dummy_path,
-                    "hostname": hostname,
-                },
-                new_status="Pending EPM / IS Review",
-            )
+            if joined:
+                st.info(
+                    f"An open request for **{app_name}** already exists. "
+                    f"You have been added to it ({ticket['request_count']} requests so far)."
+                )
+            else:
+                # ✅ ADD TICKET HISTORY EVENT
+                add_ticket_event(
+                    ticket,
+                    action="Red Scanner Whitelist Request Submitted",
+                    actor=username,
+                    details={
+                        "application": app_name,
+                        "reason": reason,
+                        "epm_category": epm_entry.get("Category") if epm_entry else None,
+                        "epm_policy": epm_entry.get("Policy") if epm_entry else None,
+                        "executable_path": dummy_path,
+                        "hostname": hostname,
+                    },
+                    new_status="Pending EPM / IS Review",
+                )
 
             st.session_state["latest_ticket"] = ticket
             st.success(f"Request prepared. Ticket ID: {ticket['ticket_id']}")
@@ -161,6 +168,15 @@ Generated automatically by EPM Scanner.
         st.success("Email successfully sent to **epm-admin@shg.de**")
         st.caption(f"Sent at: {timestamp}")
 
+        # A joined ticket may already be past intake: record the email but
+        # keep its status instead of moving it back
+        in_intake = ticket.get("status") in INTAKE_STATUSES
+        if not in_intake:
+            st.info(
+                f"Ticket {ticket['ticket_id']} is already at **{ticket.get('status')}**; "
+                "the email is recorded without a status change."
+            )
+
         add_ticket_event(
             ticket,
             action="Whitelist Request Email Sent",
@@ -170,7 +186,7 @@ Generated automatically by EPM Scanner.
                 "subject": "PM - Whitelistanfrage",
                 "time": timestamp,
             },
-            new_status="Submitted to EPM",
+            new_status="Submitted to EPM" if in_intake else None,
         )
 
         st.session_state["email_sent"] = {
@@ -1,11 +1,19 @@
 import streamlit as st
 from datetime import datetime
 
-from state.tickets import get_all_tickets, set_all_tickets
-from state.luy import get_luy_entries, init_luy_state, LUY_PV_MAP
-from components.luy_engine import LuyEngine
+from state.tickets import (
+    get_all_tickets,
+    open_edit_forms,
+    checkout_edit,
+    commit_edit,
+    edit_widget_key,
+    mark_edit_form_changed,
+    TicketConflictError,
+)
+from state.ticket_lifecycle import InvalidTransitionError
+from state.luy import get_pvs_for_capability, init_luy_state
+from components.engine_registry import get_luy_engine, get_pv_engine, engine_metrics
 from components.ticket_history import add_ticket_event
-from components.pv_rules_engine import PVEngine
 from components.requirements import show_requirements
 
 # -------------------------
@@ -32,8 +40,15 @@ user_department = user.get("department", "IS-P")
 # -------------------------
 # Engines and data
 # -------------------------
-engine = LuyEngine("components/domain_cap_map.csv")
-pv_engine = PVEngine()
+# Shared per process, rebuilt only when the CSVs change
+engine = get_luy_engine()
+pv_engine = get_pv_engine()
+
+if "admin" in user.get("roles", []):
+    with st.expander("⚙ Engine metrics"):
+        st.dataframe(engine_metrics(), use_container_width=True)
+        cache = engine.cache_info()
+        st.caption(f"Classification cache: {cache['hits']} hits, {cache['misses']} misses, {cache['size']}/{cache['maxsize']} entries")
 
 tickets = get_all_tickets()
 init_luy_state()
@@ -41,16 +56,28 @@ init_luy_state()
 # -------------------------
 # Filter IS-P tickets
 # -------------------------
-isp_tickets = []
-for t in tickets:
-    t.setdefault("department_reviews", {})
-    if t.get("approval_required") and "IS-P" in t["department_reviews"]:
-        isp_tickets.append(t)
+isp_tickets = [
+    t for t in tickets
+    if t.get("approval_required") and "IS-P" in (t.get("department_reviews") or {})
+]
 
 if not isp_tickets:
     st.info("No IS-P tickets available.")
     st.stop()
 
+# -------------------------
+# Classify all tickets in one batch
+# -------------------------
+# Not stored on the ticket: the engine caches results per input and
+# taxonomy version, so suggestions follow changes to the CSV.
+suggestions = dict(zip(
+    (t["ticket_id"] for t in isp_tickets),
+    engine.classify_many([
+        (t.get("application", ""), t.get("reason", ""), t.get("use_case", ""))
+        for t in isp_tickets
+    ]),
+))
+
 # -------------------------
 # Constants
 # -------------------------
@@ -59,7 +86,13 @@ DECISIONS = ["Approve", "Reject", "Need More Information"]
 # -------------------------
 # Process tickets
 # -------------------------
-for t in isp_tickets:
+# Forms render from their base (kept across reruns while edited), never
+# mutating the stored tickets
+bases = open_edit_forms(t["ticket_id"] for t in isp_tickets)
+
+for t in (bases[t["ticket_id"]] for t in isp_tickets):
+    form_field = {"on_change": mark_edit_form_changed, "args": (t["ticket_id"],)}
+
     with st.expander(f"{t['application']} – {t['ticket_id']}", expanded=False):
 
         st.markdown("### 📄 Ticket Details")
@@ -70,9 +103,7 @@ for t in isp_tickets:
         # ================= IS-P REVIEW =================
         st.markdown("### 🏗 IS-P Architecture Review")
 
-        review = t["department_reviews"].setdefault("IS-P", {})
-        review.setdefault("decision", "Approve")
-        review.setdefault("comment", "")
+        review = t["department_reviews"]["IS-P"] or {}
 
         decision_value = review.get("decision")
         if decision_value not in DECISIONS:
@@ -82,61 +113,61 @@ for t in isp_tickets:
             "Decision",
             DECISIONS,
             index=DECISIONS.index(decision_value),
-            key=f"{t['ticket_id']}_isp_decision"
+            key=edit_widget_key(t, "isp_decision"),
+            **form_field,
         )
 
         comment = st.text_area(
             "Architecture Comment",
             value=review.get("comment", ""),
-            key=f"{t['ticket_id']}_isp_comment"
+            key=edit_widget_key(t, "isp_comment"),
+            **form_field,
         )
 
         # ================= DOMAIN & CAPABILITY =================
         st.markdown("### 🧭 Domain & Capability Suggestions")
 
-        if not t.get("domain_suggestions") or not t.get("capability_suggestions"):
-            result = engine.classify_software(
-                software_name=t.get("application", ""),
-                description=t.get("reason", ""),
-                use_case=t.get("use_case", "")
-            )
-            t["domain_suggestions"] = result.get("domains", [])
-            t["capability_suggestions"] = result.get("capabilities", [])
-
-        domains = [d for d, _ in t["domain_suggestions"]] or ["Other / New Domain"]
-        caps = [c for c, _ in t["capability_suggestions"]]
+        domain_suggestions = suggestions[t["ticket_id"]]["domains"]
+        capability_suggestions = suggestions[t["ticket_id"]]["capabilities"]
+        domains = [d for d, _ in domain_suggestions] or ["Other / New Domain"]
+        caps = [c for c, _ in capability_suggestions]
 
         st.markdown("#### 🏛 Domains")
-        for d, s in t["domain_suggestions"]:
+        for d, s in domain_suggestions:
             st.write(f"- **{d}** (score: {s})")
 
         final_domain = st.selectbox(
             "Final Domain",
             domains,
             index=0,
-            key=f"{t['ticket_id']}_domain"
+            key=edit_widget_key(t, "domain"),
+            **form_field,
         )
 
         st.markdown("#### ⚙ Capabilities")
-        for c, s in t["capability_suggestions"]:
+        for c, s in capability_suggestions:
             st.write(f"- **{c}** (score: {s})")
 
         final_caps = st.multiselect(
             "Final Capabilities",
             caps,
             default=t.get("final_capabilities", []),
-            key=f"{t['ticket_id']}_caps"
+            key=edit_widget_key(t, "caps"),
+            **form_field,
         )
 
         # ================= SAVE =================
-        if st.button("✅ Save IS-P Review & Classification", key=f"save_{t['ticket_id']}"):
+        if st.button("✅ Save IS-P Review & Classification", key=edit_widget_key(t, "save")):
+
+            base, working = checkout_edit(t["ticket_id"])
+            saved_review = working.setdefault("department_reviews", {}).setdefault("IS-P", {})
 
-            review["decision"] = decision
-            review["comment"] = comment
-            review["domain"] = final_domain
-            review["capabilities"] = final_caps
+            saved_review["decision"] = decision
+            saved_review["comment"] = comment
+            saved_review["domain"] = final_domain
+            saved_review["capabilities"] = final_caps
 
-            review.setdefault("history", []).append({
+            saved_review.setdefault("history", []).append({
                 "timestamp": datetime.now().isoformat(),
                 "actor": username,
                 "decision": decision,
@@ -145,15 +176,16 @@ for t in isp_tickets:
                 "capabilities": final_caps
             })
 
-            t["final_domain"] = final_domain
-            t["final_capabilities"] = final_caps
-            t["classification_status"] = "Approved"
+            working["final_domain"] = final_domain
+            working["final_capabilities"] = final_caps
+            working["classification_status"] = "Approved"
 
             add_ticket_event(
-                t,
+                working,
                 action="IS-P Review Completed",
                 actor=username,
                 details={
+                    "department": "IS-P",
                     "decision": decision,
                     "comment": comment,
                     "domain": final_domain,
@@ -167,46 +199,48 @@ for t in isp_tickets:
             pv_missing = False
 
             for cap in final_caps:
-                matching_pvs = []
-                for entry in get_luy_entries():
-                    if entry.get("domain") == final_domain and cap in entry.get("capabilities", []):
-                        matching_pvs.extend(LUY_PV_MAP.get(entry["id"], []))
+                # Deactivated products still count, as in the check before the index
+                matching_pvs = get_pvs_for_capability(final_domain, cap, active_only=False)
 
                 if matching_pvs:
                     st.markdown(f"**Existing PVs for {final_domain} → {cap}:**")
-                    for pv in set(matching_pvs):
+                    for pv in matching_pvs:
                         st.write(f"- {pv}")
                 else:
                     pv_missing = True
 
-            if pv_missing:
-                t["status"] = "PV_CONTEXT_REQUIRED"
-
-                add_ticket_event(
-                    t,
-                    action="PV Context Required",
-                    actor="system",
-                    details={
-                        "domain": final_domain,
-                        "capabilities": final_caps
-                    }
-                )
+            try:
+                if pv_missing:
+                    add_ticket_event(
+                        working,
+                        action="PV Context Required",
+                        actor="system",
+                        details={
+                            "domain": final_domain,
+                            "capabilities": final_caps
+                        },
+                        new_status="PV_CONTEXT_REQUIRED"
+                    )
+                commit_edit(working, base)
+            except (TicketConflictError, InvalidTransitionError) as e:
+                st.error(f"❌ {e}. Please reload and review again.")
+                st.stop()
 
+            if pv_missing:
                 st.session_state["pv_forward_ticket"] = {
-                    "ticket_id": t["ticket_id"],
-                    "application": t["application"],
+                    "ticket_id": working["ticket_id"],
+                    "application": working["application"],
                     "domain": final_domain,
                     "capabilities": final_caps,
-                    "product_type": t.get("product_type", "Eigenentwicklung"),
-                    "level": t.get("pv_level", "L2"),
-                    "scenario": t.get("pv_scenario", "Neueinführung")
+                    "product_type": working.get("product_type", "Eigenentwicklung"),
+                    "level": working.get("pv_level", "L2"),
+                    "scenario": working.get("pv_scenario", "Neueinführung")
                 }
 
                 st.warning("No PV assigned yet. User must provide PV context.")
             else:
                 st.success("PV coverage found.")
 
-            set_all_tickets(tickets)
             st.success("IS-P review saved successfully.")
 
 # -----------------------------
@@ -221,4 +255,4 @@ show_requirements(
         }
     ],
     req_type="todo"
-)
\ No newline at end of file
+)
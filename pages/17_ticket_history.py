@@ -2,7 +2,8 @@ import streamlit as st
 from datetime import datetime
 
 from state.permissions import require_system
-from state.tickets import get_all_tickets, find_ticket
+from state.tickets import get_all_tickets, find_ticket, add_ticket_event, get_status_counts
+from state.pv_derivation import refresh_stale_obligations
 from components.requirements import show_requirements
 
 # -------------------------
@@ -28,6 +29,9 @@ st.caption(f"Logged in as: {username} ({role})")
 # -------------------------
 # Load tickets from state
 # -------------------------
+# Obligations derived from an older PV catalog are updated first
+refresh_stale_obligations()
+
 tickets = get_all_tickets()
 if not tickets:
     st.info("No tickets have been created yet.")
@@ -38,6 +42,13 @@ if not tickets:
 # -------------------------
 if role == "Admin":
     st.subheader("📋 All Tickets")
+
+    # Maintained incrementally by the ticket event bus
+    status_counts = get_status_counts()
+    cols = st.columns(min(len(status_counts), 6) or 1)
+    for i, (status, count) in enumerate(sorted(status_counts.items())):
+        cols[i % len(cols)].metric(status, count)
+
     normalized = []
     for t in tickets:
         normalized.append({
@@ -102,7 +113,7 @@ st.markdown(
 # PV RESPONSIBILITY FINALIZATION (CUSTOMER VIEW)
 # =========================================================
 
-if ticket.get("status") == "PV_RESP_FINALIZATION":
+if ticket.get("status") in ("PV_RESP_FINALIZATION", "PV_ASSIGNED"):
 
     st.divider()
     st.header("🧾 PV Responsibility Finalization")
@@ -127,11 +138,28 @@ if ticket.get("status") == "PV_RESP_FINALIZATION":
         st.markdown(
             f"**Required PV Roles:** {', '.join(derived.get('pv_roles', []))}"
         )
+        if ticket.get("pv_assignment"):
+            st.markdown(
+                "**Assigned PVs:** "
+                + ", ".join(f"{pv} ({role})" for role, pv in ticket["pv_assignment"].items() if pv)
+            )
 
     # ---- Responsibilities ----
     st.subheader("PV Responsibilities")
 
-    grouped = derived.get("responsibilities_by_process", {})
+    changes = derived.get("catalog_changes")
+    if changes:
+        st.warning(
+            f"The PV catalog changed ({changes['from_version'] or 'unversioned'} → {changes['to_version']}): "
+            f"{len(changes['added'])} tasks added, {len(changes['removed'])} removed, "
+            f"{len(changes['changed'])} changed."
+        )
+
+    grouped = derived.get("responsibilities_by_process")
+    if grouped is None:
+        grouped = {}
+        for t in derived.get("responsibilities", []):
+            grouped.setdefault(t["prozess"], []).append(t)
     for process, tasks in grouped.items():
         st.markdown(f"### {process}")
         for t in tasks:
@@ -167,16 +195,14 @@ if ticket.get("status") == "PV_RESP_FINALIZATION":
         }
 
         ticket["pv_acceptance"] = acceptance
-        ticket["status"] = (
-            "APPROVED" if decision == "Accept" else "REJECTED"
-        )
 
-        ticket.setdefault("history", []).append({
-            "action": "PV_RESPONSIBILITY_DECISION",
-            "actor": username,
-            "timestamp": acceptance["decided_at"],
-            "details": acceptance,
-        })
+        add_ticket_event(
+            ticket,
+            action="PV_RESPONSIBILITY_DECISION",
+            actor=username,
+            details=acceptance,
+            status="APPROVED" if decision == "Accept" else "REJECTED",
+        )
 
         st.success(f"Decision recorded: {acceptance['decision']}")
 
@@ -1,6 +1,8 @@
 import streamlit as st
-from components.pv_rules_engine import PVEngine
-from datetime import datetime
+from components.engine_registry import get_pv_engine, get_pv_decision_engine
+from state.tickets import add_ticket_event, open_edit_forms, checkout_edit, commit_edit, TicketConflictError
+from state.ticket_lifecycle import InvalidTransitionError
+from state.pv_derivation import WHAT_IF_FIELDS, build_pv_eligibility, build_derived_obligations, what_if_matrix
 
 st.set_page_config(
     page_title="PV Context Mapping",
@@ -21,7 +23,26 @@ if "latest_ticket" not in st.session_state or st.session_state.latest_ticket is
     st.error("No ticket available. Please access this page via a ticket.")
     st.stop()
 
-ticket = st.session_state.latest_ticket
+# Render from the form's base; writes go through checkout_edit / commit_edit
+ticket_id = st.session_state.latest_ticket["ticket_id"]
+try:
+    ticket = open_edit_forms([ticket_id])[ticket_id]
+except KeyError:
+    st.error(f"Ticket {ticket_id} no longer exists.")
+    st.stop()
+
+
+def save_pv_decision(action, status, details, **fields):
+    """Write `fields` and the status change on a working copy and commit it."""
+    base, working = checkout_edit(ticket_id)
+    working.update(fields)
+    try:
+        add_ticket_event(working, action=action, details=details, status=status)
+        commit_edit(working, base)
+    except (TicketConflictError, InvalidTransitionError) as e:
+        st.error(f"❌ {e}")
+        return False
+    return True
 
 # =========================================================
 # A. PRODUCT / SOFTWARE FACTS (AUTO-FILLED)
@@ -125,73 +146,21 @@ with col3:
 st.divider()
 st.header("PV Eligibility Decision")
 
-def decide_pv_required(
-    product_type,
-    tool_type,
-    business_criticality,
-    personal_data,
-    regulatory_relevant,
-    internet_exposed,
-    deployment,
-):
-    reasons = []
-
-    # -------------------------------------------------
-    # 1. Tool type baseline
-    # -------------------------------------------------
-    if tool_type in ["Enterprise application", "SaaS application", "Desktop application"]:
-        reasons.append(f"Tool type: {tool_type}")
-
-    elif tool_type in ["Developer tool / IDE extension", "System utility / runtime"]:
-        if personal_data or regulatory_relevant:
-            reasons.append(f"Regulated use of {tool_type}")
-
-    elif tool_type == "Script / automation":
-        if business_criticality in ["High", "Mission Critical"]:
-            reasons.append("High business critical automation")
-
-    # -------------------------------------------------
-    # 2. Risk-based escalation
-    # -------------------------------------------------
-    if business_criticality in ["High", "Mission Critical"]:
-        reasons.append("High business criticality")
-
-    if personal_data:
-        reasons.append("Processes personal data")
-
-    if regulatory_relevant:
-        reasons.append("Regulatory relevance")
-
-    if internet_exposed:
-        reasons.append("Internet exposed")
-
-    if deployment == "SaaS":
-        reasons.append("Externally operated (SaaS)")
-
-    # -------------------------------------------------
-    # 3. Internal low-risk shortcut
-    # -------------------------------------------------
-    if product_type == "Eigenentwicklung" and tool_type == "Script / automation" and not reasons:
-        return False, ["Low-risk internal script"]
-
-    return len(reasons) > 0, reasons
-
-pv_required, pv_reasons = decide_pv_required(
-    product_type=product_type,
-    tool_type=tool_type,
-    business_criticality=business_criticality,
-    personal_data=personal_data,
-    regulatory_relevant=regulatory_relevant,
-    internet_exposed=internet_exposed,
-    deployment=deployment,
-)
-
-ticket["pv_eligibility"] = {
-    "pv_required": pv_required,
-    "reasons": pv_reasons,
-    "decided_at": datetime.now().isoformat(),
-    "decided_by": "PV_ELIGIBILITY_ENGINE",
+decision_engine = get_pv_decision_engine()
+decision_context = {
+    "product_type": product_type,
+    "tool_type": tool_type,
+    "business_criticality": business_criticality,
+    "personal_data": personal_data,
+    "regulatory_relevant": regulatory_relevant,
+    "internet_exposed": internet_exposed,
+    "deployment": deployment,
 }
+eligibility = decision_engine.evaluate(decision_context)
+pv_required, pv_reasons = eligibility["pv_required"], eligibility["eligibility_reasons"]
+
+# Display only; persisted together with the decision below
+pv_eligibility = build_pv_eligibility(eligibility)
 
 if pv_required:
     st.warning("🟡 Product Responsible (PV) is REQUIRED")
@@ -201,8 +170,15 @@ if pv_required:
 else:
     st.success("🟢 No Product Responsible (PV) required")
     st.caption("No further PV responsibilities are necessary.")
-    ticket["status"] = "PV_NOT_REQUIRED"
-    st.json(ticket["pv_eligibility"])
+    if ticket.get("status") != "PV_NOT_REQUIRED" and st.button("✅ Confirm: PV not required"):
+        if save_pv_decision(
+            "PV not required",
+            "PV_NOT_REQUIRED",
+            {"reasons": pv_reasons},
+            pv_eligibility=pv_eligibility,
+        ):
+            st.success("Ticket marked as PV not required.")
+    st.json(pv_eligibility)
     st.stop()
 
 # =========================================================
@@ -243,82 +219,36 @@ with col3:
     )
 
 # =========================================================
-# LEVEL INFERENCE (L0–L4) CAPPED BY TOOL TYPE
-# =========================================================
-level_order = ["L0", "L1", "L2", "L3", "L4"]
-
-base_level_map = {
-    "Low": "L1",
-    "Medium": "L2",
-    "High": "L3",
-    "Mission Critical": "L4",
-}
-
-level = base_level_map.get(business_criticality, "L2")
-idx = level_order.index(level)
-
-def bump(idx, steps=1):
-    return min(idx + steps, len(level_order) - 1)
-
-if user_count == "500–5000":
-    idx = bump(idx, 1)
-elif user_count == ">5000":
-    idx = bump(idx, 2)
-
-if deployment == "SaaS":
-    idx = bump(idx, 1)
-
-if regulatory_relevant:
-    idx = bump(idx, 1)
-
-if personal_data:
-    idx = bump(idx, 1)
-
-if internet_exposed:
-    idx = bump(idx, 1)
-
-level = level_order[idx]
-
-# Cap level by tool type
-TOOL_TYPE_MAX_LEVEL = {
-    "Script / automation": "L1",
-    "Developer tool / IDE extension": "L2",
-    "System utility / runtime": "L2",
-    "Desktop application": "L3",
-    "Enterprise application": "L4",
-    "SaaS application": "L4",
-}
-max_level = TOOL_TYPE_MAX_LEVEL.get(tool_type, "L4")
-if level_order.index(level) > level_order.index(max_level):
-    level = max_level
-
-# =========================================================
-# SCENARIO INFERENCE
+# LEVEL & SCENARIO INFERENCE (components/pv_rules.yaml)
 # =========================================================
-scenario = "Neueinführung"
-
-if change_frequency == "Frequent":
-    scenario = "Maintenance"
-elif release_frequency in ["Planned", "Continuous"]:
-    scenario = "Release Upgrade"
-elif regulatory_relevant or personal_data:
-    scenario = "Security relevant"
+decision_context.update({
+    "user_count": user_count,
+    "change_frequency": change_frequency,
+    "release_frequency": release_frequency,
+})
+decision = decision_engine.evaluate(decision_context)
+level = decision["level"]
+scenario = decision["scenario"]
 
 # =========================================================
 # D. DERIVED PV OBLIGATIONS
 # =========================================================
 st.header("D. Derived Obligations (Calculated)")
 
-pv_engine = PVEngine()
+pv_engine = get_pv_engine()
 derived_tasks = pv_engine.get_pv_responsibilities(
     product_type=product_type,
     scenario=scenario,
     level=level
 )
 
-grouped_tasks = pv_engine.group_by_process(derived_tasks)
+grouped_tasks = pv_engine.get_pv_responsibilities_by_process(
+    product_type=product_type,
+    scenario=scenario,
+    level=level
+)
 
-for process, tasks in grouped_tasks.items():
+for process, tasks in grouped_tasks:
     st.subheader(process)
     for t in tasks:
         st.markdown(
@@ -326,6 +256,34 @@ for process, tasks in grouped_tasks.items():
             f"(Frequency: {t['häufigkeit']})"
         )
 
+# =========================================================
+# WHAT-IF SENSITIVITY
+# =========================================================
+with st.expander("🔀 What-if: level, scenario and obligations for other inputs"):
+    varied = st.multiselect(
+        "Inputs to vary",
+        list(WHAT_IF_FIELDS),
+        default=list(WHAT_IF_FIELDS),
+        format_func=lambda f: f.replace("_", " ").capitalize(),
+    )
+    if varied:
+        baseline, matrix = what_if_matrix(
+            decision_context,
+            {f: decision_engine.inputs[f]["values"] for f in varied},
+        )
+        st.caption(
+            f"Current: {baseline['level']} · {baseline['scenario']} · "
+            f"{baseline['obligations']} obligations · {len(matrix)} variations"
+        )
+        if st.checkbox("Only variations that change the outcome", value=True):
+            matrix = matrix[
+                (matrix["level_delta"] != 0)
+                | matrix["scenario_changed"]
+                | (matrix["obligations_delta"] != 0)
+                | ~matrix["pv_required"]
+            ]
+        st.dataframe(matrix, use_container_width=True, hide_index=True)
+
 # =========================================================
 # SAVE RESULT
 # =========================================================
@@ -333,21 +291,18 @@ st.divider()
 st.header("E. Persist Derived PV Obligations")
 
 if st.button("💾 Save PV decision & obligations"):
-    ticket["derived_obligations"] = {
-        "pv_required": True,
-        "eligibility_reasons": pv_reasons,
-        "level": level,
-        "scenario": scenario,
-        "responsibilities": derived_tasks,
-        "processes": sorted({t["prozess"] for t in derived_tasks}),
-        "pv_roles": sorted({t["pv"] for t in derived_tasks}),
-        "calculated_at": datetime.now().isoformat(),
-        "calculated_by": "PV_CONTEXT_MAPPING",
-    }
-
-    ticket["status"] = "PV_RESP_FINALIZATION"
-
-    st.success("PV obligations saved successfully.")
-    st.json(ticket["derived_obligations"])
+    obligations = build_derived_obligations(
+        decision_context,
+        calculated_by="PV_CONTEXT_MAPPING",
+    )
+    if save_pv_decision(
+        "PV obligations derived",
+        "PV_RESP_FINALIZATION",
+        {"level": level, "scenario": scenario},
+        pv_eligibility=pv_eligibility,
+        derived_obligations=obligations,
+    ):
+        st.success("PV obligations saved successfully.")
+        st.json(obligations)
 
 
@@ -0,0 +1,57 @@
+import streamlit as st
+from state.permissions import require_system, require_role
+from state.ticket_import import import_tickets, detect_format, source_fingerprint
+
+st.session_state["device_current_page"] = "23_ticket_import"  # unique per page
+
+# -----------------------------
+# Page setup
+# -----------------------------
+st.set_page_config(page_title="Legacy Ticket Import", layout="wide")
+require_system("epm")
+require_role("admin")
+
+st.title("📥 Legacy Ticket Import")
+st.caption(
+    "Import existing whitelist requests from ITSM exports (CSV, JSONL or XLSX). "
+    "Rows are validated and inserted in chunks; an interrupted import resumes from its checkpoint."
+)
+
+# -----------------------------
+# Upload
+# -----------------------------
+uploaded = st.file_uploader("Export file", type=["csv", "jsonl", "json", "xlsx"])
+chunk_size = st.number_input("Chunk size", min_value=100, max_value=50000, value=1000, step=100)
+
+if uploaded and st.button("Start import"):
+    progress = st.progress(0, text="Importing…")
+    total = max(uploaded.size, 1)
+
+    def on_progress(checkpoint):
+        # Byte position is only a rough estimate, but it keeps the bar moving
+        done = min(uploaded.tell() / total, 1.0) if not uploaded.closed else 1.0
+        progress.progress(done, text=f"{checkpoint['imported']} tickets imported")
+
+    # Keyed on the content: a different file never resumes this checkpoint
+    fingerprint = source_fingerprint(uploaded)
+    summary = import_tickets(
+        uploaded,
+        fmt=detect_format(uploaded.name),
+        source_name=uploaded.name,
+        chunk_size=int(chunk_size),
+        checkpoint_path=f".import_{fingerprint}.checkpoint.json",
+        fingerprint=fingerprint,
+        on_progress=on_progress,
+    )
+    progress.progress(1.0, text="Import finished")
+    if summary["resumed_after"]:
+        st.info(f"Resumed after row {summary['resumed_after']} of an interrupted import.")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Imported", summary["imported"])
+    col2.metric("Skipped (already present)", summary["skipped"])
+    col3.metric("Invalid rows", summary["errors"])
+
+    if summary["error_samples"]:
+        with st.expander("Validation errors"):
+            st.dataframe(summary["error_samples"], use_container_width=True)
@@ -0,0 +1,139 @@
+import streamlit as st
+from state.pv_derivation import refresh_stale_obligations
+from state.pv_workload import (
+    DEFAULT_ANNUAL_CAPACITY,
+    TASKS_PER_YEAR,
+    UNASSIGNED,
+    WORKLOAD_STATUSES,
+    apply_pv_assignments,
+    get_pv_workload,
+    propose_pv_assignments,
+    pv_workload_rows,
+    rebuild_pv_workload,
+    tickets_awaiting_pv,
+)
+
+st.session_state["device_current_page"] = "24_pv_workload"  # unique per page
+
+st.set_page_config(page_title="PV Workload", page_icon="⚖️", layout="wide")
+
+st.title("⚖️ PV Workload")
+st.caption(
+    "Expected annual PV tasks from the derived obligations of "
+    f"{' / '.join(WORKLOAD_STATUSES)} tickets, per PV, role and domain."
+)
+
+if st.button("🔄 Recalculate"):
+    # PV assignments in LUY or PV_USERS may have changed without a ticket event
+    rebuild_pv_workload()
+
+# Obligations derived from an older PV catalog are updated first
+refreshed = refresh_stale_obligations()
+if refreshed["updated"]:
+    st.info(f"{refreshed['updated']} tickets were updated to the current PV catalog.")
+
+workload = get_pv_workload()
+rows = pv_workload_rows()
+overloaded = [r for r in rows if r["Overloaded"]]
+
+# =========================================================
+# Summary
+# =========================================================
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Tickets counted", len(workload["tickets"]))
+col2.metric("Annual tasks", round(sum(workload["role"].values()), 1))
+col3.metric("Overloaded PVs", len(overloaded))
+col4.metric("Unassigned tasks / year", round(workload["pv"].get(UNASSIGNED, 0), 1))
+
+if overloaded:
+    st.error(
+        "Overloaded: "
+        + ", ".join(f"{r['PV']} ({r['Annual tasks']} / {r['Capacity']})" for r in overloaded)
+    )
+
+# =========================================================
+# Per PV
+# =========================================================
+st.header("Per PV")
+st.dataframe(
+    rows,
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "Utilization %": st.column_config.ProgressColumn(
+            "Utilization %", min_value=0, max_value=max([100] + [r["Utilization %"] or 0 for r in rows]),
+            format="%.0f%%",
+        ),
+    },
+)
+
+# =========================================================
+# Per role / domain
+# =========================================================
+col1, col2 = st.columns(2)
+with col1:
+    st.header("Per role")
+    st.dataframe(
+        [{"Role": k, "Annual tasks": round(v, 1)} for k, v in sorted(workload["role"].items())],
+        use_container_width=True,
+        hide_index=True,
+    )
+with col2:
+    st.header("Per domain")
+    st.dataframe(
+        [{"Domain": k, "Annual tasks": round(v, 1)} for k, v in sorted(workload["domain"].items(), key=lambda kv: -kv[1])],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+# =========================================================
+# Balanced PV assignment
+# =========================================================
+st.header("Assign PVs")
+awaiting = tickets_awaiting_pv()
+st.caption(
+    f"{len(awaiting)} tickets with derived obligations have no PV yet. "
+    "The proposal picks one PV per required role from the PVs covering the "
+    "ticket's domain and spreads the work by current load."
+)
+
+if st.button("🧮 Propose assignment", disabled=not awaiting):
+    st.session_state.pv_assignment_proposal = propose_pv_assignments(awaiting)
+
+proposal = st.session_state.get("pv_assignment_proposal")
+if proposal:
+    applications = {t["ticket_id"]: t.get("application") for t in awaiting}
+    st.dataframe(
+        [
+            {"Ticket": ticket_id, "Application": applications.get(ticket_id, ""), "Role": role, "PV": pv or "— no eligible PV —"}
+            for ticket_id, roles in proposal.items()
+            for role, pv in roles.items()
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+    if st.button("✅ Apply assignment"):
+        summary = apply_pv_assignments(proposal, actor=(st.session_state.get("user") or {}).get("username", "system"))
+        del st.session_state.pv_assignment_proposal
+        st.success(
+            f"{summary['assigned']} tickets assigned, {summary['no_eligible_pv']} without eligible PV, "
+            f"{len(summary['partial'])} partially covered, {summary['conflicts']} changed concurrently."
+        )
+        if summary["partial"]:
+            st.warning("Not assigned: no eligible PV for some required roles.")
+            st.dataframe(summary["partial"], use_container_width=True)
+        if summary["errors"]:
+            st.dataframe(summary["errors"], use_container_width=True)
+
+with st.expander("How the load is estimated"):
+    st.markdown(
+        f"- Default capacity: **{DEFAULT_ANNUAL_CAPACITY}** tasks per PV and year "
+        "(`annual_capacity` in `PV_USERS` overrides it)\n"
+        "- A task is shared evenly by the ticket's PVs holding its role; "
+        "PVs come from ticket assignments, accepted PV responsibility and `LUY_PV_MAP`"
+    )
+    st.dataframe(
+        [{"Häufigkeit": k, "Tasks per year": v} for k, v in TASKS_PER_YEAR.items()],
+        use_container_width=True,
+        hide_index=True,
+    )
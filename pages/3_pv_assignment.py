@@ -1,6 +1,21 @@
 import streamlit as st
-from state.tickets import get_all_tickets, set_all_tickets
+from state.tickets import (
+    get_all_tickets,
+    open_edit_forms,
+    checkout_edit,
+    commit_edit,
+    edit_widget_key,
+    mark_edit_form_changed,
+    TicketConflictError,
+)
 from components.ticket_history import add_ticket_event
+from state.pv_derivation import (
+    DERIVATION_STATUS,
+    advance_derivation_job,
+    get_derivation_job,
+    start_derivation_job,
+    stop_derivation_job,
+)
 from datetime import datetime
 
 st.session_state["device_current_page"] = "pv_context_request"
@@ -12,6 +27,51 @@ st.title("🛠 PV Context Required")
 
 # Load tickets
 tickets = get_all_tickets()
+
+# =========================================================
+# Batch PV derivation (PV_CONTEXT_PROVIDED tickets)
+# =========================================================
+def derivation_job_status(job_running):
+    # Each (fragment) run derives one time slice of the job
+    job = advance_derivation_job()
+    if not job:
+        return
+    summary = job["summary"]
+    total = max(summary["total"], 1)
+    st.progress(
+        min(summary["processed"] / total, 1.0),
+        text=f"{job['state']}: {summary['processed']} / {summary['total']} tickets",
+    )
+    if job["state"] == "running":
+        return
+    if job_running:
+        # Finished while polling: refresh the whole page (ticket lists, counts)
+        st.rerun()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Obligations derived", summary.get("derived", 0))
+    col2.metric("PV not required", summary.get("not_required", 0))
+    col3.metric("Conflicts", summary.get("conflicts", 0))
+    col4.metric("Seconds", job["seconds"])
+    if job["error"]:
+        st.error(job["error"])
+    if summary.get("errors"):
+        st.dataframe(summary["errors"], use_container_width=True)
+
+if "admin" in user.get("roles", []):
+    with st.expander("⚙ Batch PV derivation"):
+        pending = sum(1 for t in tickets if t.get("status") == DERIVATION_STATUS)
+        st.caption(f"{pending} tickets with provided PV context are waiting for derivation.")
+        job = get_derivation_job()
+        if job and job["state"] == "running":
+            if st.button("⏹ Stop derivation"):
+                stop_derivation_job()
+        elif st.button("▶ Derive PV obligations", disabled=not pending):
+            job = start_derivation_job()
+
+        job_running = bool(job) and job["state"] == "running"
+        st.fragment(run_every=1 if job_running else None)(derivation_job_status)(job_running)
+
 pv_context_tickets = [t for t in tickets if t.get("status") == "PV_CONTEXT_REQUIRED"]
 
 if not pv_context_tickets:
@@ -23,7 +83,17 @@ selected_ticket_id = st.selectbox(
     [t["ticket_id"] for t in pv_context_tickets]
 )
 
-ticket = next(t for t in pv_context_tickets if t["ticket_id"] == selected_ticket_id)
+# The form renders from its base (kept across reruns, released when another
+# ticket is selected or the page is left), not from the stored ticket
+ticket = open_edit_forms([selected_ticket_id])[selected_ticket_id]
+
+
+def form_field(name):
+    return {
+        "key": edit_widget_key(ticket, name),
+        "on_change": mark_edit_form_changed,
+        "args": (ticket["ticket_id"],),
+    }
 
 st.subheader(f"Ticket: {ticket.get('application')} ({ticket['ticket_id']})")
 st.write(f"**Reason:** {ticket.get('reason', '')}")
@@ -39,12 +109,14 @@ with col3:
     deployment = st.selectbox(
         "Deployment type",
         ["SaaS", "On-Prem", "Hybrid"],
-        index=["SaaS", "On-Prem", "Hybrid"].index(ticket.get("deployment", "SaaS"))
+        index=["SaaS", "On-Prem", "Hybrid"].index(ticket.get("deployment", "SaaS")),
+        **form_field("deployment")
     )
     business_criticality = st.selectbox(
         "Business criticality",
         ["Low", "Medium", "High", "Mission Critical"],
-        index=["Low", "Medium", "High", "Mission Critical"].index(ticket.get("business_criticality", "Medium"))
+        index=["Low", "Medium", "High", "Mission Critical"].index(ticket.get("business_criticality", "Medium")),
+        **form_field("business_criticality")
     )
 
 # =========================================================
@@ -54,23 +126,25 @@ st.header("B. Risk & Compliance Indicators")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    personal_data = st.checkbox("Processes personal data", value=ticket.get("personal_data", False))
-    authentication = st.checkbox("Authenticates users", value=ticket.get("authentication", False))
+    personal_data = st.checkbox("Processes personal data", value=ticket.get("personal_data", False), **form_field("personal_data"))
+    authentication = st.checkbox("Authenticates users", value=ticket.get("authentication", False), **form_field("authentication"))
 
 with col2:
-    internet_exposed = st.checkbox("Internet exposed", value=ticket.get("internet_exposed", False))
-    regulatory_relevant = st.checkbox("Regulatory relevant", value=ticket.get("regulatory_relevant", False))
+    internet_exposed = st.checkbox("Internet exposed", value=ticket.get("internet_exposed", False), **form_field("internet_exposed"))
+    regulatory_relevant = st.checkbox("Regulatory relevant", value=ticket.get("regulatory_relevant", False), **form_field("regulatory_relevant"))
 
 with col3:
     availability = st.selectbox(
         "Availability requirement",
         ["Best effort", "Business hours", "24/7"],
-        index=["Best effort", "Business hours", "24/7"].index(ticket.get("availability", "Business hours"))
+        index=["Best effort", "Business hours", "24/7"].index(ticket.get("availability", "Business hours")),
+        **form_field("availability")
     )
     data_classification = st.selectbox(
         "Data classification",
         ["Public", "Internal", "Confidential", "Restricted"],
-        index=["Public", "Internal", "Confidential", "Restricted"].index(ticket.get("data_classification", "Internal"))
+        index=["Public", "Internal", "Confidential", "Restricted"].index(ticket.get("data_classification", "Internal")),
+        **form_field("data_classification")
     )
 
 # =========================================================
@@ -83,43 +157,50 @@ with col1:
     user_count = st.selectbox(
         "Number of users",
         ["<50", "50–500", "500–5000", ">5000"],
-        index=["<50", "50–500", "500–5000", ">5000"].index(ticket.get("user_count", "<50"))
+        index=["<50", "50–500", "500–5000", ">5000"].index(ticket.get("user_count", "<50")),
+        **form_field("user_count")
     )
     support_model = st.selectbox(
         "Support model",
         ["None", "Best effort", "Defined SLA"],
-        index=["None", "Best effort", "Defined SLA"].index(ticket.get("support_model", "Best effort"))
+        index=["None", "Best effort", "Defined SLA"].index(ticket.get("support_model", "Best effort")),
+        **form_field("support_model")
     )
 
 with col2:
     change_frequency = st.selectbox(
         "Change frequency",
         ["Rare", "Occasional", "Frequent"],
-        index=["Rare", "Occasional", "Frequent"].index(ticket.get("change_frequency", "Occasional"))
+        index=["Rare", "Occasional", "Frequent"].index(ticket.get("change_frequency", "Occasional")),
+        **form_field("change_frequency")
     )
     release_frequency = st.selectbox(
         "Release frequency",
         ["Ad-hoc", "Planned", "Continuous"],
-        index=["Ad-hoc", "Planned", "Continuous"].index(ticket.get("release_frequency", "Planned"))
+        index=["Ad-hoc", "Planned", "Continuous"].index(ticket.get("release_frequency", "Planned")),
+        **form_field("release_frequency")
     )
 
 with col3:
     integrations = st.selectbox(
         "Integration criticality",
         ["None", "Low", "High"],
-        index=["None", "Low", "High"].index(ticket.get("integrations", "Low"))
+        index=["None", "Low", "High"].index(ticket.get("integrations", "Low")),
+        **form_field("integrations")
     )
     customization = st.selectbox(
         "Customization level",
         ["Standard", "Configured", "Highly customized"],
-        index=["Standard", "Configured", "Highly customized"].index(ticket.get("customization", "Standard"))
+        index=["Standard", "Configured", "Highly customized"].index(ticket.get("customization", "Standard")),
+        **form_field("customization")
     )
 
 # =========================================================
 # Save PV Context
 # =========================================================
 if st.button("✅ Submit PV Context"):
-    ticket.update({
+    base, working = checkout_edit(ticket["ticket_id"])
+    working.update({
         "deployment": deployment,
         "business_criticality": business_criticality,
         "personal_data": personal_data,
@@ -134,12 +215,11 @@ if st.button("✅ Submit PV Context"):
         "release_frequency": release_frequency,
         "integrations": integrations,
         "customization": customization,
-        "status": "PV_CONTEXT_PROVIDED",
         "journey": "pv_context_request",
     })
 
     add_ticket_event(
-        ticket,
+        working,
         action="PV context provided by user",
         actor=username,
         details={
@@ -161,5 +241,9 @@ if st.button("✅ Submit PV Context"):
         new_status="PV_CONTEXT_PROVIDED"
     )
 
-    set_all_tickets(tickets)
-    st.success("PV context submitted successfully! PV assignment can now proceed.")
+    try:
+        commit_edit(working, base)
+    except TicketConflictError as e:
+        st.error(f"❌ {e}. Please reload and submit again.")
+    else:
+        st.success("PV context submitted successfully! PV assignment can now proceed.")
@@ -3,6 +3,7 @@ import random
 from state.tickets import get_latest_ticket
 from components.requirements import show_requirements
 from components.ticket_history import add_ticket_event
+from state.ticket_lifecycle import check_transition
 
 
 st.session_state["device_current_page"] = "5_shop_artikel"  # unique per page
@@ -82,7 +83,12 @@ if not ticket.get("application") or not ticket.get("reason"):
 if st.button("Submit for AI Check"):
    # decision = random.choice(["whitelist", "blacklist", "Greylist"])
     decision = "Greylist" #remove this only for testing
-    ticket["status"] = "Shop Artikel Completed"
+
+    error = check_transition(ticket, "Shop Artikel Completed")
+    if error:
+        st.error(f"❌ {error}")
+        st.stop()
+
     ticket["decision"] = decision
     ticket["journey"] = "shop_artikel"
 
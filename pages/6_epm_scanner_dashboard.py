@@ -3,7 +3,7 @@ import pandas as pd
 from state.epm_lists import init_epm_lists, get_epm_lists, set_epm_lists, find_epm_entry
 from state.tickets import get_latest_ticket, get_all_tickets, set_all_tickets
 from state.permissions import require_system, require_role
-from state.luy import init_luy_state, FIXED_LUY_PRODUCTS
+from state.luy import init_luy_state, set_luy_entries, FIXED_LUY_PRODUCTS
 from components.requirements import show_requirements
 
 # -----------------------------
@@ -38,9 +38,9 @@ init_epm_lists()
 # Populate EPM lists from LUY if empty
 # -----------------------------
 # Ensure LUY entries have the blocked key
-st.session_state["luy_entries"] = [
+set_luy_entries(
     {**app, "blocked": app.get("blocked", False)} for app in FIXED_LUY_PRODUCTS
-]
+)
 
 def populate_epm_lists_from_luy():
     blacklist, whitelist, greylist = get_epm_lists()
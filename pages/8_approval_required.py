@@ -3,8 +3,15 @@ import pandas as pd
 from state.permissions import require_system
 from state.tickets import (
     get_all_tickets,
-    set_all_tickets,
+    open_edit_forms,
+    checkout_edit,
+    commit_edit,
+    edit_widget_key,
+    mark_edit_form_changed,
+    release_edit_base,
+    TicketConflictError,
 )
+from state.ticket_lifecycle import check_transition
 from components.ticket_history import add_ticket_event, sync_department_reviews_from_history
 from components.requirements import show_requirements
 
@@ -62,6 +69,7 @@ df = pd.DataFrame([
         "Status": t.get("approval_status","Pending"),
         "Step": t.get("approval_step","Department Review"),
         "Created By": t.get("created_by","Unknown"),
+        "Requests": t.get("request_count", 1),
         "Date": t.get("date","")
     }
     for t in greylist
@@ -75,9 +83,26 @@ selected_option = st.selectbox(
 )
 
 selected_ticket_id = selected_option.split(" – ")[1]
-ticket = next((t for t in greylist if t["ticket_id"] == selected_ticket_id), None)
+
+# Work on a copy of the form's base: taken when the ticket is opened, kept
+# across reruns while there are unsaved edits, refreshed from the store
+# otherwise and released when another ticket is selected or the page is left.
+# Changes are written back with a version check.
+open_edit_forms([selected_ticket_id])
+base, ticket = checkout_edit(selected_ticket_id)
 sync_department_reviews_from_history(ticket)
 
+if st.button("🔄 Discard changes & reload", key=f"reload_{selected_ticket_id}"):
+    release_edit_base(selected_ticket_id)
+    st.rerun()
+
+def save_ticket():
+    try:
+        commit_edit(ticket, base)
+    except TicketConflictError as e:
+        st.error(f"❌ {e}. Please reload the page and review again.")
+        st.stop()
+
 # -----------------------------
 # Display selected ticket details
 # -----------------------------
@@ -89,6 +114,9 @@ if ticket:
     st.write(f"**Application:** {ticket['application']}")
     st.write(f"**Reason:** {ticket.get('reason','')}")
     st.write(f"**Requested by:** {ticket.get('created_by','Unknown')}")
+    if ticket.get("request_count", 1) > 1:
+        subscribers = [s["username"] for s in ticket.get("subscribers", [])]
+        st.write(f"**Requests:** {ticket['request_count']} (also requested by: {', '.join(subscribers) or '—'})")
     st.write(f"**Decision:** {ticket.get('decision','')}")
     st.write(f"**Approval Status:** {ticket.get('approval_status','Pending')}")
     st.write(f"**Departments Informed:** {', '.join(ticket.get('departments_informed',[]))}")
@@ -113,12 +141,16 @@ if ticket:
                     f"{dept} decision",
                     ["Approve", "Reject", "Need More Information"],
                     index=["Approve","Reject","Need More Information"].index(decision) if decision else 0,
-                    key=f"{ticket['ticket_id']}_{dept}_decision"
+                    key=edit_widget_key(base, f"{dept}_decision"),
+                    on_change=mark_edit_form_changed,
+                    args=(selected_ticket_id,),
                 )
                 new_comment = st.text_area(
                     f"{dept} comment",
                     value=comment,
-                    key=f"{ticket['ticket_id']}_{dept}_comment"
+                    key=edit_widget_key(base, f"{dept}_comment"),
+                    on_change=mark_edit_form_changed,
+                    args=(selected_ticket_id,),
                 )
 
                 if new_decision != decision or new_comment != comment:
@@ -169,6 +201,7 @@ if ticket:
         for d in departments
     ]
 
+    reviews_completed_logged = False
     if all(all_decisions) and not ticket.get("_all_reviews_logged"):
         add_ticket_event(
             ticket,
@@ -183,10 +216,12 @@ if ticket:
             }
         )
         ticket["_all_reviews_logged"] = True
+        reviews_completed_logged = True
 
-    if is_admin and updates_made:
-        set_all_tickets(tickets)
-        st.success("✅ Department reviews updated")
+    if (is_admin and updates_made) or reviews_completed_logged:
+        save_ticket()
+        if updates_made:
+            st.success("✅ Department reviews updated")
 
     # -----------------------------
     # Final Decision Summary
@@ -212,6 +247,11 @@ if ticket:
     # -----------------------------
     if is_admin:
         if st.button("Apply Final Decision & Update Ticket"):
+            error = check_transition(ticket, final_status)
+            if error:
+                st.error(f"❌ {error}")
+                st.stop()
+
             ticket["approval_status"] = final_status
 
             # ✅ HISTORY EVENT
@@ -229,7 +269,7 @@ if ticket:
                 new_status=final_status
             )
 
-            set_all_tickets(tickets)
+            save_ticket()
             st.success(f"Ticket updated. Final status: {final_status}")
 
 # -----------------------------
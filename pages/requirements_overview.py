@@ -1,42 +1,123 @@
 import streamlit as st
-from state.requirements import get_all_requirements, load_all_requirements
+from state.requirements import (
+    FILTER_FIELDS,
+    load_all_requirements,
+    get_requirement_summary,
+    filter_requirement_ids,
+    requirement_page,
+)
 
 st.title("📋 Requirements Overview")
 
 # Load persisted data
 load_all_requirements()
 
-requirements = get_all_requirements()
+requirements = st.session_state.requirements
+summary = get_requirement_summary()
 
-if not requirements:
+if not summary["total"]:
     st.info("No requirements have been added yet.")
     st.stop()
 
-for r in requirements:
-    header = f"{r.get('id')} – {r.get('title','')}"
-    with st.expander(header):
-        st.write(f"**Type:** {r.get('type','')}")
-        st.write(f"**Section:** {r.get('section','')}")
-        st.write(f"**Current Status:** {r.get('status','')}")
-        st.write("---")
-
-        history = r.get("history", [])
-        if not history:
-            st.info("No history yet.")
-            continue
-
-        for h in history:
-            details = h.get("details", {})
-            from_s = details.get("from", "—")
-            to_s = details.get("to", "—")
-
-            entry_header = (
-                f"{h.get('timestamp')} | "
-                f"{h.get('actor')} | "
-                f"{from_s} → {to_s}"
-            )
-
-            with st.expander(entry_header):
-                st.write("**Action:**", h.get("action"))
-                st.write("**Comment:**")
-                st.write(details.get("comment", "—"))
+def _title_text(title):
+    if isinstance(title, dict):
+        return title.get("text") or title.get("id") or ""
+    return title or ""
+
+# -----------------------------
+# Aggregates
+# -----------------------------
+col1, col2, *status_cols = st.columns(2 + len(summary["counts"]["status"]))
+col1.metric("Requirements", summary["total"])
+col2.metric("History events", summary["history_events"])
+for col, (status, count) in zip(status_cols, sorted(summary["counts"]["status"].items())):
+    col.metric(status or "—", count)
+
+with st.expander("Counts by type and page"):
+    c1, c2 = st.columns(2)
+    c1.dataframe(
+        [{"Type": k, "Count": v} for k, v in sorted(summary["counts"]["type"].items())],
+        use_container_width=True,
+    )
+    c2.dataframe(
+        [{"Page": k, "Count": v} for k, v in sorted(summary["counts"]["page"].items())],
+        use_container_width=True,
+    )
+
+# -----------------------------
+# Filters
+# -----------------------------
+filter_cols = st.columns(len(FILTER_FIELDS))
+filters = {
+    field: col.multiselect(field.title(), sorted(summary["counts"][field]), key=f"req_filter_{field}")
+    for col, field in zip(filter_cols, FILTER_FIELDS)
+}
+search = st.text_input("Search in ID / title", key="req_filter_search").strip().lower()
+
+ids = filter_requirement_ids(filters)
+if search:
+    ids = [
+        req_id for req_id in ids
+        if search in req_id.lower()
+        or search in _title_text(requirements[req_id].get("title")).lower()
+    ]
+
+if not ids:
+    st.info("No requirements match the filters.")
+    st.stop()
+
+# -----------------------------
+# Paginated table
+# -----------------------------
+p1, p2, p3 = st.columns([1, 1, 3])
+page_size = p1.selectbox("Rows per page", [25, 50, 100, 250], key="req_page_size")
+page_count = (len(ids) - 1) // page_size + 1
+if st.session_state.get("req_page_no", 1) > page_count:
+    st.session_state.req_page_no = 1
+page_no = p2.number_input("Page", min_value=1, max_value=page_count, value=1, key="req_page_no")
+p3.caption(f"{len(ids)} matching requirements, page {page_no} of {page_count}")
+
+page_ids = ids[(page_no - 1) * page_size:page_no * page_size]
+rows = []
+for req_id in page_ids:
+    r = requirements[req_id]
+    rows.append({
+        "ID": req_id,
+        "Title": _title_text(r.get("title")),
+        "Page": requirement_page(r),
+        "Section": r.get("section", ""),
+        "Type": r.get("type", ""),
+        "Status": r.get("status", ""),
+        "Actor": r.get("actor", ""),
+        "History": len(r.get("history", [])),
+    })
+st.dataframe(rows, use_container_width=True, hide_index=True)
+
+# -----------------------------
+# History (only for the opened requirement)
+# -----------------------------
+opened = st.selectbox("Open requirement", ["—"] + page_ids, key="req_opened")
+if opened != "—":
+    r = requirements[opened]
+    st.subheader(_title_text(r.get("title")))
+    st.write(f"**Type:** {r.get('type','')} · **Section:** {r.get('section','')} · **Current Status:** {r.get('status','')}")
+
+    history = r.get("history", [])
+    if not history:
+        st.info("No history yet.")
+    else:
+        st.dataframe(
+            [
+                {
+                    "Timestamp": h.get("timestamp"),
+                    "Actor": h.get("actor"),
+                    "Action": h.get("action"),
+                    "From": h.get("details", {}).get("from", "—"),
+                    "To": h.get("details", {}).get("to", "—"),
+                    "Comment": h.get("details", {}).get("comment", "—"),
+                }
+                for h in reversed(history)
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
@@ -91,13 +91,123 @@ LUY_PV_MAP = {
     "LUY-004": ["alice.admin", "max.mustermann"],
 }
 
+# =====================================================
+# Indexed LUY catalog
+# =====================================================
+class LuyCatalog:
+    """
+    LUY entries in insertion order with hash indexes by id and name and
+    inverted indexes by domain, capability and vendor. Entries are changed
+    through add / update / deactivate so the indexes stay consistent.
+    """
+
+    def __init__(self, entries=()):
+        self.entries = []
+        self.by_id = {}
+        self.by_name = {}        # name -> {id: entry}, first added wins on lookup
+        self.by_domain = {}      # domain -> {id: entry}
+        self.by_capability = {}  # capability -> {id: entry}
+        self.by_vendor = {}      # vendor -> {id: entry}
+        self.add_many(entries)
+
+    def _postings(self, entry):
+        yield self.by_name, entry.get("name")
+        yield self.by_domain, entry.get("domain")
+        yield self.by_vendor, entry.get("vendor")
+        for capability in entry.get("capabilities") or []:
+            yield self.by_capability, capability
+
+    def _index(self, entry):
+        for index, key in self._postings(entry):
+            if key is not None:
+                index.setdefault(key, {})[entry["id"]] = entry
+
+    def _unindex(self, entry):
+        for index, key in self._postings(entry):
+            postings = index.get(key)
+            if postings is not None:
+                postings.pop(entry["id"], None)
+                if not postings:
+                    del index[key]
+
+    def add(self, entry):
+        """Add an entry; an entry with the same id is kept and returned."""
+        if not entry.get("id"):
+            raise ValueError("LUY entry must contain an 'id'")
+        existing = self.by_id.get(entry["id"])
+        if existing is not None:
+            return existing
+        self.by_id[entry["id"]] = entry
+        self.entries.append(entry)
+        self._index(entry)
+        return entry
+
+    def add_many(self, entries):
+        """Bulk insert in O(n); returns the number of new entries."""
+        before = len(self.entries)
+        for entry in entries:
+            self.add(entry)
+        return len(self.entries) - before
+
+    def update(self, entry_id, **changes):
+        entry = self.by_id.get(entry_id)
+        if entry is None:
+            raise KeyError(f"Unknown LUY entry '{entry_id}'")
+        if "id" in changes and changes["id"] != entry_id:
+            raise ValueError("The id of a LUY entry cannot be changed")
+        self._unindex(entry)
+        entry.update(changes)
+        self._index(entry)
+        return entry
+
+    def deactivate(self, entry_id):
+        return self.update(entry_id, active=False)
+
+    def get(self, entry_id):
+        return self.by_id.get(entry_id)
+
+    def get_by_name(self, name):
+        postings = self.by_name.get(name)
+        return next(iter(postings.values())) if postings else None
+
+    def find(self, domain=None, capability=None, vendor=None, active_only=True):
+        """Entries matching every given field, in insertion order."""
+        postings = [
+            index.get(key, {})
+            for index, key in (
+                (self.by_domain, domain),
+                (self.by_capability, capability),
+                (self.by_vendor, vendor),
+            )
+            if key is not None
+        ]
+        if not postings:
+            candidates = self.by_id
+        else:
+            postings.sort(key=len)
+            candidates = {
+                entry_id: entry for entry_id, entry in postings[0].items()
+                if all(entry_id in p for p in postings[1:])
+            }
+        return [
+            entry for entry in candidates.values()
+            if not active_only or entry.get("active", True)
+        ]
+
 # =====================================================
 # Initialization
 # =====================================================
 def init_luy_state():
     if "luy_entries" not in st.session_state:
         # Seed once, never overwrite again
-        st.session_state.luy_entries = FIXED_LUY_PRODUCTS.copy()
+        st.session_state.luy_entries = [dict(e) for e in FIXED_LUY_PRODUCTS]
+
+    catalog = st.session_state.get("luy_catalog")
+    if catalog is None or catalog.entries is not st.session_state.luy_entries:
+        # First run, or luy_entries was replaced directly: re-index it
+        catalog = LuyCatalog(st.session_state.luy_entries)
+        st.session_state.luy_catalog = catalog
+        st.session_state.luy_entries = catalog.entries
 
     if "luy_discussions" not in st.session_state:
         st.session_state.luy_discussions = {}
@@ -142,17 +252,31 @@ def load_domain_capabilities():
 # =====================================================
 # LUY Catalog (Source of Truth)
 # =====================================================
-def get_luy_entries():
+def get_luy_catalog():
     init_luy_state()
-    return st.session_state.luy_entries
+    return st.session_state.luy_catalog
+
+
+def get_luy_entries():
+    return get_luy_catalog().entries
+
+
+def set_luy_entries(entries):
+    """Replace the whole catalog (bulk, O(n))."""
+    st.session_state.luy_entries = list(entries)
+    st.session_state.pop("luy_catalog", None)
+    return get_luy_catalog()
 
 
 def get_luy_entry_by_name(name: str):
-    init_luy_state()
-    return next(
-        (e for e in st.session_state.luy_entries if e.get("name") == name),
-        None
-    )
+    return get_luy_catalog().get_by_name(name)
+
+
+def _with_defaults(entry: dict):
+    entry.setdefault("active", True)
+    entry.setdefault("created_at", datetime.utcnow().isoformat())
+    entry.setdefault("source", "manual")
+    return entry
 
 
 def add_luy_entry(entry: dict):
@@ -160,28 +284,51 @@ def add_luy_entry(entry: dict):
     Add a LUY entry (manual or automatic).
     Prevents duplicate IDs.
     """
-    init_luy_state()
+    catalog = get_luy_catalog()
 
     entry_id = entry.get("id")
     if not entry_id:
         raise ValueError("LUY entry must contain an 'id'")
 
-    existing_ids = {e["id"] for e in st.session_state.luy_entries}
-    if entry_id in existing_ids:
+    if catalog.get(entry_id) is not None:
         return entry  # already exists
 
-    entry.setdefault("active", True)
-    entry.setdefault("created_at", datetime.utcnow().isoformat())
-    entry.setdefault("source", "manual")
+    return catalog.add(_with_defaults(entry))
+
+
+def add_luy_entries(entries):
+    """Bulk add; entries with an existing ID are skipped. Returns the number added."""
+    catalog = get_luy_catalog()
+    for entry in entries:
+        if not entry.get("id"):
+            raise ValueError("LUY entry must contain an 'id'")
+    return catalog.add_many(_with_defaults(e) for e in entries if catalog.get(e["id"]) is None)
+
+
+def update_luy_entry(luy_id: str, **changes):
+    return get_luy_catalog().update(luy_id, **changes)
 
-    st.session_state.luy_entries.append(entry)
-    return entry
+
+def deactivate_luy_entry(luy_id: str):
+    return get_luy_catalog().deactivate(luy_id)
+
+
+def find_luy_entries(domain=None, capability=None, vendor=None, active_only=True):
+    return get_luy_catalog().find(domain=domain, capability=capability, vendor=vendor, active_only=active_only)
 
 
 def get_pv_for_product(luy_id: str):
     init_luy_state()
     return LUY_PV_MAP.get(luy_id, [])
 
+
+def get_pvs_for_capability(domain: str, capability: str, active_only=True):
+    """PVs of the LUY products covering domain and capability (active ones unless active_only=False)."""
+    pvs = []
+    for entry in find_luy_entries(domain=domain, capability=capability, active_only=active_only):
+        pvs.extend(LUY_PV_MAP.get(entry["id"], []))
+    return list(dict.fromkeys(pvs))
+
 # =====================================================
 # Vendors / Products
 # =====================================================
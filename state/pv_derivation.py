@@ -0,0 +1,449 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from components.engine_registry import get_engine_version, get_pv_decision_engine, get_pv_engine
+from components.pv_rules_engine import PVEngine
+from state import ticket_events
+from state.tickets import (
+    TicketConflictError,
+    add_ticket_event,
+    checkout_ticket,
+    commit_ticket,
+    get_all_tickets,
+    init_tickets,
+)
+
+# -------------------------
+# PV CONTEXT OF A TICKET
+# -------------------------
+# Ticket fields read by the PV decision rules (components/pv_rules.yaml).
+# Fields the ticket does not have fall back to the rule defaults, which are
+# the initial widget values of the PV context mapping page.
+PV_DECISION_FIELDS = (
+    "product_type",
+    "tool_type",
+    "business_criticality",
+    "deployment",
+    "personal_data",
+    "regulatory_relevant",
+    "internet_exposed",
+    "user_count",
+    "change_frequency",
+    "release_frequency",
+)
+
+
+def ticket_decision_context(ticket):
+    return {field: ticket.get(field) for field in PV_DECISION_FIELDS}
+
+# -------------------------
+# SHARED DERIVATION
+# -------------------------
+def build_pv_eligibility(decision, decided_by="PV_ELIGIBILITY_ENGINE"):
+    return {
+        "pv_required": decision["pv_required"],
+        "reasons": list(decision["eligibility_reasons"]),
+        "decided_at": datetime.now().isoformat(),
+        "decided_by": decided_by,
+    }
+
+
+def build_derived_obligations(context, calculated_by):
+    """
+    ticket["derived_obligations"] for a PV context: eligibility, level,
+    scenario and the PV responsibilities of that combination. Used by the
+    PV context mapping page and the batch derivation job.
+    """
+    decision = get_pv_decision_engine().evaluate(context)
+    product_type = get_pv_decision_engine().normalize_context(context)["product_type"]
+    tasks = get_pv_engine().get_pv_responsibilities(
+        product_type=product_type,
+        scenario=decision["scenario"],
+        level=decision["level"],
+    )
+    return {
+        "pv_required": decision["pv_required"],
+        "eligibility_reasons": decision["eligibility_reasons"],
+        "product_type": product_type,
+        "level": decision["level"],
+        "scenario": decision["scenario"],
+        "catalog_version": get_pv_engine().version,
+        "responsibilities": [dict(t, relevanz=list(t["relevanz"])) for t in tasks],
+        "processes": sorted({t["prozess"] for t in tasks}),
+        "pv_roles": sorted({t["pv"] for t in tasks}),
+        "calculated_at": datetime.now().isoformat(),
+        "calculated_by": calculated_by,
+    }
+
+# -------------------------
+# OBLIGATION DEPENDENCY INDEX
+# -------------------------
+def obligation_key(ticket):
+    """
+    (catalog_version, product_type, scenario, level) the ticket's obligations
+    were derived from, or None without obligations. Obligations saved before
+    versioning have catalog_version None.
+    """
+    derived = ticket.get("derived_obligations") or {}
+    if not derived.get("responsibilities") or ticket.get("status") == "REJECTED":
+        return None
+    product_type = derived.get("product_type") or get_pv_decision_engine().normalize_context(
+        {"product_type": ticket.get("product_type")}
+    )["product_type"]
+    return (derived.get("catalog_version"), *PVEngine.lookup_key(product_type, derived.get("scenario"), derived.get("level")))
+
+
+def _index_obligations(index, ticket):
+    ticket_id = ticket["ticket_id"]
+    old_key = index["by_ticket"].pop(ticket_id, None)
+    if old_key is not None:
+        ids = index["by_key"][old_key]
+        ids.discard(ticket_id)
+        if not ids:
+            del index["by_key"][old_key]
+    key = obligation_key(ticket)
+    if key is not None:
+        index["by_ticket"][ticket_id] = key
+        index["by_key"].setdefault(key, set()).add(ticket_id)
+
+
+def _obligation_index_on_events(items):
+    """obligation_index: obligation key -> ticket IDs, and ticket ID -> key"""
+    if "obligation_index" not in st.session_state:
+        return
+    index = st.session_state.obligation_index
+    touched = {ticket["ticket_id"]: ticket for ticket, _ in items}
+    for ticket_id, ticket in touched.items():
+        _index_obligations(index, st.session_state.ticket_index.get(ticket_id, ticket))
+
+
+def _obligation_index_on_reset(ticket_list):
+    index = {"by_key": {}, "by_ticket": {}}
+    for t in ticket_list:
+        _index_obligations(index, t)
+    st.session_state.obligation_index = index
+
+
+ticket_events.subscribe("obligation_index", _obligation_index_on_events, _obligation_index_on_reset)
+
+
+def get_obligation_index():
+    init_tickets()
+    if "obligation_index" not in st.session_state:
+        _obligation_index_on_reset(get_all_tickets())
+    return st.session_state.obligation_index
+
+# -------------------------
+# CATALOG CHANGES
+# -------------------------
+CATALOG_ACTOR = "PV_CATALOG_UPDATE"
+
+# (old version, new version) -> affected lookup keys
+_AFFECTED_KEYS = {}
+
+
+def _affected_keys(old_version, engine):
+    """Lookup keys changed since `old_version`; None if that version is unknown."""
+    pair = (old_version, engine.version)
+    if pair not in _AFFECTED_KEYS:
+        old_engine = get_engine_version("pv", old_version) if old_version else None
+        _AFFECTED_KEYS[pair] = engine.affected_keys(old_engine) if old_engine else None
+    return _AFFECTED_KEYS[pair]
+
+
+def stale_obligation_ids():
+    """
+    Tickets whose obligations differ under the current PV catalog, found
+    through the dependency index: only keys of older catalog versions are
+    diffed, no ticket is scanned. Tickets derived from a version no longer
+    known are always included.
+    """
+    engine = get_pv_engine()
+    stale = []
+    for key, ids in get_obligation_index()["by_key"].items():
+        version, lookup_key = key[0], key[1:]
+        if version == engine.version:
+            continue
+        affected = _affected_keys(version, engine)
+        if affected is None or lookup_key in affected:
+            stale.extend(ids)
+    return stale
+
+
+def refresh_stale_obligations(actor=CATALOG_ACTOR):
+    """
+    Recompute the responsibilities of every stale ticket with the current
+    catalog and annotate them with the task changes. Tickets whose
+    responsibilities did not change keep their obligations.
+    Returns outcome counts.
+    """
+    summary = {"updated": 0, "conflicts": 0, "errors": []}
+    ticket_ids = stale_obligation_ids()
+    if not ticket_ids:
+        return summary
+
+    engine = get_pv_engine()
+    with ticket_events.batch():
+        for ticket_id in ticket_ids:
+            try:
+                base, working = checkout_ticket(ticket_id)
+                derived = working["derived_obligations"]
+                _, product_type, scenario, level = obligation_key(working)
+                tasks = engine.get_pv_responsibilities(product_type, scenario, level)
+                changes = PVEngine.diff_tasks(derived["responsibilities"], tasks)
+
+                derived.update({
+                    "product_type": product_type,
+                    "catalog_version": engine.version,
+                    "responsibilities": [dict(t, relevanz=list(t["relevanz"])) for t in tasks],
+                    "processes": sorted({t["prozess"] for t in tasks}),
+                    "pv_roles": sorted({t["pv"] for t in tasks}),
+                    "recalculated_at": datetime.now().isoformat(),
+                })
+                if any(changes.values()):
+                    derived["catalog_changes"] = {
+                        "from_version": base["derived_obligations"].get("catalog_version"),
+                        "to_version": engine.version,
+                        **{kind: [list(k) for k in keys] for kind, keys in changes.items()},
+                    }
+                    add_ticket_event(
+                        working,
+                        action="PV obligations updated from catalog",
+                        actor=actor,
+                        details={"catalog_version": engine.version, **{k: len(v) for k, v in changes.items()}},
+                    )
+                commit_ticket(working, base, refresh=False)
+                summary["updated"] += 1
+            except TicketConflictError:
+                summary["conflicts"] += 1
+            except (KeyError, ValueError) as e:
+                summary["errors"].append({"ticket_id": ticket_id, "error": str(e)})
+    return summary
+
+# -------------------------
+# BATCH DERIVATION
+# -------------------------
+DERIVATION_STATUS = "PV_CONTEXT_PROVIDED"
+DERIVATION_ACTOR = "PV_DERIVATION_JOB"
+
+
+def pending_derivation_ids():
+    return [t["ticket_id"] for t in get_all_tickets() if t.get("status") == DERIVATION_STATUS]
+
+
+def _derive_ticket(ticket_id, actor):
+    """Checkout, derive and commit one ticket. Returns the outcome key."""
+    base, working = checkout_ticket(ticket_id)
+    if working.get("status") != DERIVATION_STATUS:
+        return "skipped"
+
+    context = ticket_decision_context(working)
+    decision = get_pv_decision_engine().evaluate(context)
+    working["pv_eligibility"] = build_pv_eligibility(decision)
+
+    if decision["pv_required"]:
+        working["derived_obligations"] = build_derived_obligations(context, calculated_by=actor)
+        add_ticket_event(
+            working,
+            action="PV obligations derived",
+            actor=actor,
+            details={"level": decision["level"], "scenario": decision["scenario"]},
+            status="PV_RESP_FINALIZATION",
+        )
+        outcome = "derived"
+    else:
+        add_ticket_event(
+            working,
+            action="PV not required",
+            actor=actor,
+            details={"reasons": decision["eligibility_reasons"]},
+            status="PV_NOT_REQUIRED",
+        )
+        outcome = "not_required"
+
+    commit_ticket(working, base, refresh=False)
+    return outcome
+
+
+def derive_pending_obligations(ticket_ids=None, chunk_size=500, actor=DERIVATION_ACTOR, on_progress=None, should_stop=None):
+    """
+    Derive PV eligibility and obligations for every PV_CONTEXT_PROVIDED ticket.
+
+    Tickets are processed in chunks of `chunk_size`; each ticket is written
+    with checkout_ticket/commit_ticket and the bus events of a chunk are
+    published together. A ticket changed concurrently is counted as a
+    conflict and left in its status for the next run.
+
+    Returns a summary dict with the outcome counts.
+    """
+    ticket_ids = pending_derivation_ids() if ticket_ids is None else list(ticket_ids)
+    summary = {"total": len(ticket_ids), "processed": 0, "derived": 0, "not_required": 0,
+               "skipped": 0, "conflicts": 0, "errors": []}
+
+    for start in range(0, len(ticket_ids), chunk_size):
+        if should_stop and should_stop():
+            break
+        with ticket_events.batch():
+            for ticket_id in ticket_ids[start:start + chunk_size]:
+                try:
+                    summary[_derive_ticket(ticket_id, actor)] += 1
+                except TicketConflictError:
+                    summary["conflicts"] += 1
+                except (KeyError, ValueError) as e:
+                    summary["errors"].append({"ticket_id": ticket_id, "error": str(e)})
+                summary["processed"] += 1
+        if on_progress:
+            on_progress(summary)
+
+    return summary
+
+# -------------------------
+# CHUNKED JOB
+# -------------------------
+# The job runs in the session's own script runs (page 3 polls it from a
+# fragment every second), one time slice per run. No thread ever touches
+# the ticket store concurrently with a rerun.
+DERIVATION_TIME_SLICE = 0.5
+
+
+def get_derivation_job():
+    return st.session_state.get("pv_derivation_job")
+
+
+def start_derivation_job(chunk_size=500):
+    """
+    Queue every PV_CONTEXT_PROVIDED ticket for derivation. Progress is kept
+    in st.session_state.pv_derivation_job and advanced by
+    advance_derivation_job(). Returns the job dict, or the running one.
+    """
+    job = get_derivation_job()
+    if job and job["state"] == "running":
+        return job
+
+    ticket_ids = pending_derivation_ids()
+    job = {
+        "state": "running",
+        "ticket_ids": ticket_ids,
+        "position": 0,
+        "chunk_size": chunk_size,
+        "summary": {"total": len(ticket_ids), "processed": 0, "derived": 0, "not_required": 0,
+                    "skipped": 0, "conflicts": 0, "errors": []},
+        "started_at": datetime.now().isoformat(),
+        "finished_at": None,
+        "seconds": 0.0,
+        "error": None,
+    }
+    st.session_state.pv_derivation_job = job
+    return job
+
+
+def advance_derivation_job(time_slice=DERIVATION_TIME_SLICE):
+    """Derive chunks of the running job for up to `time_slice` seconds."""
+    job = get_derivation_job()
+    if not job or job["state"] != "running":
+        return job
+
+    started = time.perf_counter()
+    summary = job["summary"]
+    try:
+        while job["position"] < len(job["ticket_ids"]) and time.perf_counter() - started < time_slice:
+            chunk = job["ticket_ids"][job["position"]:job["position"] + job["chunk_size"]]
+            part = derive_pending_obligations(chunk, chunk_size=job["chunk_size"])
+            for key in ("processed", "derived", "not_required", "skipped", "conflicts"):
+                summary[key] += part[key]
+            summary["errors"].extend(part["errors"])
+            job["position"] += len(chunk)
+    except Exception as e:
+        job["state"] = "failed"
+        job["error"] = str(e)
+
+    job["seconds"] = round(job["seconds"] + time.perf_counter() - started, 3)
+    if job["state"] == "running" and job["position"] >= len(job["ticket_ids"]):
+        job["state"] = "finished"
+    if job["state"] != "running":
+        job["finished_at"] = datetime.now().isoformat()
+    return job
+
+
+def stop_derivation_job():
+    job = get_derivation_job()
+    if job and job["state"] == "running":
+        job["state"] = "stopped"
+        job["finished_at"] = datetime.now().isoformat()
+
+# -------------------------
+# WHAT-IF MATRIX
+# -------------------------
+# Context inputs varied by default: criticality x user count x deployment x risk flags
+WHAT_IF_FIELDS = (
+    "business_criticality",
+    "user_count",
+    "deployment",
+    "personal_data",
+    "regulatory_relevant",
+    "internet_exposed",
+)
+
+
+def _obligation_counts(decision_engine, pv_engine):
+    """counts[product_type, scenario, level] = number of PV responsibilities."""
+    product_types = decision_engine.inputs["product_type"]["values"]
+    counts = np.zeros(
+        (len(product_types), len(decision_engine.scenarios), len(decision_engine.levels)),
+        dtype=np.int32,
+    )
+    for p, product_type in enumerate(product_types):
+        for s, scenario in enumerate(decision_engine.scenarios):
+            for l, level in enumerate(decision_engine.levels):
+                counts[p, s, l] = len(pv_engine.get_pv_responsibilities(product_type, scenario, level))
+    return counts
+
+
+def what_if_matrix(context, variations=None):
+    """
+    Level, scenario and obligation count for every variation of a PV context,
+    with deltas against the context itself. `variations` maps fields to the
+    values to try and defaults to all declared values of WHAT_IF_FIELDS.
+
+    Returns (baseline dict, DataFrame with one row per combination).
+    """
+    decision_engine = get_pv_decision_engine()
+    if variations is None:
+        variations = {f: decision_engine.inputs[f]["values"] for f in WHAT_IF_FIELDS}
+
+    counts = _obligation_counts(decision_engine, get_pv_engine())
+    product_code = decision_engine.codes["product_type"].get(
+        decision_engine.normalize_context(context)["product_type"]
+    )
+    if product_code is None:
+        raise ValueError(f"Invalid product_type: {context.get('product_type')}")
+
+    grid = decision_engine.evaluate_grid(context, variations)
+    obligations = np.where(grid["pv_required"], counts[product_code, grid["scenario"], grid["level"]], 0)
+
+    base = decision_engine.evaluate(context)
+    base_level = decision_engine.levels.index(base["level"])
+    base_obligations = (
+        int(counts[product_code, decision_engine.scenarios.index(base["scenario"]), base_level])
+        if base["pv_required"] else 0
+    )
+
+    columns = {
+        field: np.asarray(variations[field], dtype=object)[grid["axes"][:, i]]
+        for i, field in enumerate(grid["fields"])
+    }
+    columns.update({
+        "pv_required": grid["pv_required"],
+        "level": np.asarray(decision_engine.levels, dtype=object)[grid["level"]],
+        "level_delta": grid["level"] - base_level,
+        "scenario": np.asarray(decision_engine.scenarios, dtype=object)[grid["scenario"]],
+        "scenario_changed": grid["scenario"] != decision_engine.scenarios.index(base["scenario"]),
+        "obligations": obligations,
+        "obligations_delta": obligations - base_obligations,
+    })
+    baseline = dict(base, obligations=base_obligations)
+    return baseline, pd.DataFrame(columns)
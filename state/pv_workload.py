@@ -0,0 +1,275 @@
+import streamlit as st
+
+from components.pv_assignment_engine import PVAssignmentEngine
+from state import ticket_events
+from state.luy import LUY_PV_MAP, get_luy_entry_by_name
+from state.tickets import (
+    TicketConflictError,
+    add_ticket_event,
+    checkout_ticket,
+    commit_ticket,
+    get_all_tickets,
+    init_tickets,
+)
+from state.user import PV_USERS
+
+# -------------------------
+# ANNUAL LOAD PER TASK
+# -------------------------
+# Expected occurrences per year of a PV task by its "häufigkeit". On-demand
+# frequencies are estimates; unknown or empty frequencies count as once a year.
+TASKS_PER_YEAR = {
+    "jährlich": 1,
+    "halbjährlich": 2,
+    "quartalsweise": 4,
+    "monatlich": 12,
+    "wöchentlich": 52,
+    "bei Bedarf": 2,
+    "auf Anfrage": 1,
+    "Initial sowie laufend": 4,
+    "Initial, mindestens jährlich und bei Bedarf": 3,
+}
+DEFAULT_TASKS_PER_YEAR = 1
+
+# Tickets whose obligations count towards PV workload
+WORKLOAD_STATUSES = ("PV_ASSIGNED", "APPROVED")
+
+# Annual tasks a PV can carry unless PV_USERS sets "annual_capacity"
+DEFAULT_ANNUAL_CAPACITY = 40
+
+UNASSIGNED = "(unassigned)"
+
+
+def annual_load(frequency):
+    return TASKS_PER_YEAR.get((frequency or "").strip(), DEFAULT_TASKS_PER_YEAR)
+
+
+def pv_role(task_pv):
+    """PV task column ("technisch"/"fachlich") -> PV_USERS role."""
+    return f"PV_{(task_pv or '').strip().upper()}"
+
+
+def pv_capacity(username):
+    return PV_USERS.get(username, {}).get("annual_capacity", DEFAULT_ANNUAL_CAPACITY)
+
+# -------------------------
+# PVS OF A TICKET
+# -------------------------
+def ticket_pvs(ticket):
+    """
+    PVs responsible for a ticket: explicit assignments, an accepted PV
+    responsibility and the PVs of the LUY product with the same name.
+    """
+    pvs = list(ticket.get("assigned_pvs") or [])
+
+    acceptance = ticket.get("pv_acceptance") or {}
+    if acceptance.get("decision") == "ACCEPTED" and acceptance.get("decided_by"):
+        pvs.append(acceptance["decided_by"])
+
+    entry = get_luy_entry_by_name(ticket.get("application"))
+    if entry:
+        pvs.extend(LUY_PV_MAP.get(entry["id"], []))
+
+    return list(dict.fromkeys(pvs))
+
+
+def ticket_domain(ticket):
+    return ticket.get("final_domain") or ticket.get("domain") or "—"
+
+
+def ticket_workload(ticket):
+    """
+    Annual load a ticket adds: {"pv": {...}, "role": {...}, "domain": {...}}.
+    A task is shared evenly by the ticket's PVs holding its role; tasks no
+    PV can take are booked on UNASSIGNED.
+    """
+    obligations = ticket.get("derived_obligations") or {}
+    if ticket.get("status") not in WORKLOAD_STATUSES or not obligations.get("responsibilities"):
+        return None
+
+    pvs = ticket_pvs(ticket)
+    domain = ticket_domain(ticket)
+    load = {"pv": {}, "role": {}, "domain": {}}
+
+    for task in obligations["responsibilities"]:
+        role = pv_role(task.get("pv"))
+        amount = annual_load(task.get("häufigkeit"))
+        holders = [pv for pv in pvs if role in PV_USERS.get(pv, {}).get("pv_roles", [])] or [UNASSIGNED]
+        for pv in holders:
+            load["pv"][pv] = load["pv"].get(pv, 0) + amount / len(holders)
+        load["role"][role] = load["role"].get(role, 0) + amount
+        load["domain"][domain] = load["domain"].get(domain, 0) + amount
+
+    return load
+
+# -------------------------
+# INCREMENTAL AGGREGATES
+# -------------------------
+def _add_load(workload, load, sign):
+    for dimension, values in load.items():
+        totals = workload[dimension]
+        for key, amount in values.items():
+            total = totals.get(key, 0) + sign * amount
+            if abs(total) < 1e-9:
+                totals.pop(key, None)
+            else:
+                totals[key] = total
+
+
+def _update_ticket(workload, ticket):
+    ticket_id = ticket["ticket_id"]
+    previous = workload["tickets"].pop(ticket_id, None)
+    if previous:
+        _add_load(workload, previous, -1)
+    load = ticket_workload(ticket)
+    if load:
+        workload["tickets"][ticket_id] = load
+        _add_load(workload, load, +1)
+
+
+def _workload_on_events(items):
+    """pv_workload: annual load per PV / role / domain of approved tickets"""
+    if "pv_workload" not in st.session_state:
+        return
+    workload = st.session_state.pv_workload
+    # Every event may change status, obligations or assignments; recompute
+    # each touched ticket once against its stored state
+    touched = {ticket["ticket_id"]: ticket for ticket, _ in items}
+    for ticket_id, ticket in touched.items():
+        _update_ticket(workload, st.session_state.ticket_index.get(ticket_id, ticket))
+
+
+def _workload_on_reset(ticket_list):
+    workload = {"tickets": {}, "pv": {}, "role": {}, "domain": {}}
+    for t in ticket_list:
+        _update_ticket(workload, t)
+    st.session_state.pv_workload = workload
+
+
+ticket_events.subscribe("pv_workload", _workload_on_events, _workload_on_reset)
+
+
+def get_pv_workload():
+    init_tickets()
+    if "pv_workload" not in st.session_state:
+        _workload_on_reset(get_all_tickets())
+    return st.session_state.pv_workload
+
+
+def rebuild_pv_workload():
+    init_tickets()
+    _workload_on_reset(get_all_tickets())
+    return st.session_state.pv_workload
+
+
+def pv_workload_rows():
+    """One row per PV with annual load, capacity and overload flag."""
+    workload = get_pv_workload()
+    pvs = set(workload["pv"]) | {u for u, p in PV_USERS.items() if p.get("active", True)}
+    rows = []
+    for pv in sorted(pvs):
+        load = workload["pv"].get(pv, 0)
+        capacity = pv_capacity(pv) if pv != UNASSIGNED else None
+        profile = PV_USERS.get(pv, {})
+        rows.append({
+            "PV": profile.get("display_name", pv),
+            "Username": pv,
+            "Roles": ", ".join(profile.get("pv_roles", [])),
+            "Domains": ", ".join(profile.get("domains", [])),
+            "Annual tasks": round(load, 1),
+            "Capacity": capacity,
+            "Utilization %": round(100 * load / capacity, 1) if capacity else None,
+            "Overloaded": bool(capacity) and load > capacity,
+        })
+    return rows
+
+
+# -------------------------
+# PV ASSIGNMENT
+# -------------------------
+# Tickets waiting for a PV; the assignment moves them to PV_ASSIGNED
+ASSIGNMENT_STATUS = "PV_RESP_FINALIZATION"
+
+_ASSIGNMENT_ENGINE = {}
+
+
+def get_pv_assignment_engine():
+    """(pv_role, domain) -> PV index over PV_USERS, built once per process."""
+    if "engine" not in _ASSIGNMENT_ENGINE:
+        _ASSIGNMENT_ENGINE["engine"] = PVAssignmentEngine(PV_USERS)
+    return _ASSIGNMENT_ENGINE["engine"]
+
+
+def tickets_awaiting_pv():
+    return [
+        t for t in get_all_tickets()
+        if t.get("status") == ASSIGNMENT_STATUS
+        and not t.get("assigned_pvs")
+        and (t.get("derived_obligations") or {}).get("responsibilities")
+    ]
+
+
+def propose_pv_assignments(tickets=None):
+    """
+    Balanced proposal {ticket_id: {pv_role: username or None}}: one PV per
+    required role, eligible for the ticket's domain, respecting the current
+    workload. Nothing is written.
+    """
+    tickets = tickets_awaiting_pv() if tickets is None else tickets
+
+    demands = []
+    demand_loads = []
+    for t in tickets:
+        role_loads = {}
+        for task in t["derived_obligations"]["responsibilities"]:
+            role = pv_role(task.get("pv"))
+            role_loads[role] = role_loads.get(role, 0) + annual_load(task.get("häufigkeit"))
+        for role, amount in role_loads.items():
+            demands.append(((t["ticket_id"], role), role, ticket_domain(t)))
+            demand_loads.append(amount)
+
+    unit_load = sum(demand_loads) / len(demand_loads) if demand_loads else 1.0
+    result = get_pv_assignment_engine().assign(demands, get_pv_workload()["pv"], unit_load)
+
+    proposal = {}
+    for (ticket_id, role), username in result.items():
+        proposal.setdefault(ticket_id, {})[role] = username
+    return proposal
+
+
+def apply_pv_assignments(proposal, actor="PV_ASSIGNMENT_ENGINE"):
+    """
+    Write a proposal: assigned_pvs / pv_assignment and status PV_ASSIGNED.
+    Only tickets with a PV for every required role are written; the others
+    stay in PV_RESP_FINALIZATION and are proposed again later ("partial":
+    some roles covered, "no_eligible_pv": none). Returns outcome counts.
+    """
+    summary = {"assigned": 0, "partial": [], "no_eligible_pv": 0, "conflicts": 0, "errors": []}
+    with ticket_events.batch():
+        for ticket_id, roles in proposal.items():
+            missing = [role for role, pv in roles.items() if not pv]
+            if len(missing) == len(roles):
+                summary["no_eligible_pv"] += 1
+                continue
+            if missing:
+                summary["partial"].append({"ticket_id": ticket_id, "missing_roles": missing})
+                continue
+            pvs = list(dict.fromkeys(roles.values()))
+            try:
+                base, working = checkout_ticket(ticket_id)
+                working["assigned_pvs"] = pvs
+                working["pv_assignment"] = dict(roles)
+                add_ticket_event(
+                    working,
+                    action="PV assigned",
+                    actor=actor,
+                    details={"assignment": dict(roles)},
+                    status="PV_ASSIGNED",
+                )
+                commit_ticket(working, base, refresh=False)
+                summary["assigned"] += 1
+            except TicketConflictError:
+                summary["conflicts"] += 1
+            except (KeyError, ValueError) as e:
+                summary["errors"].append({"ticket_id": ticket_id, "error": str(e)})
+    return summary
@@ -1,63 +1,399 @@
 import os
 import json
+import time
+import atexit
+import logging
+import threading
 from datetime import datetime
 import streamlit as st
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional: without it every rerun rescans the store
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
 STORE_DIR = "requirement_store"
 
+# Append-only log: one full requirement record per line, last write wins
+STORE_LOG = os.path.join(STORE_DIR, "requirements.jsonl")
+
 # -----------------------------
-# Init
+# Process-wide index
 # -----------------------------
-def init_requirement_store():
-    os.makedirs(STORE_DIR, exist_ok=True)
-    if "requirements" not in st.session_state:
-        st.session_state.requirements = {}
+# Loaded once per process and shared by all sessions; reruns only
+# re-point st.session_state.requirements at it and stat the store.
+_INDEX = {}
+_LOADED = False
+
+# Bumped on every index change; derived aggregates are rebuilt lazily
+_VERSION = 0
+_LOCK = threading.RLock()
+
+# Drop-in files: filename -> ((mtime_ns, size), requirement id); unchanged files
+# are not re-read. Applied records carry "source_file" so a restart does not
+# re-apply them and a deleted file can be traced back to its requirement.
+_MANIFEST = {}
+
+# Log read position, so reruns only parse lines appended since the last refresh.
+# "lines" counts records in the log, used to decide when to compact.
+_LOG_STATE = {"inode": None, "offset": 0, "lines": 0}
+
+def _read_log(stat):
+    """Replay the log, or only its new tail if the file was just appended to."""
+    global _VERSION
+    if stat.st_ino != _LOG_STATE["inode"] or stat.st_size < _LOG_STATE["offset"]:
+        _LOG_STATE.update(inode=stat.st_ino, offset=0, lines=0)
+    if stat.st_size == _LOG_STATE["offset"]:
+        return
+
+    with open(STORE_LOG, "rb") as f:
+        f.seek(_LOG_STATE["offset"])
+        data = f.read()
+
+    # A line still being written has no newline yet; pick it up next time.
+    # A torn line left by a crash is terminated by the next write and skipped.
+    complete = data[:data.rfind(b"\n") + 1]
+    for line in complete.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        _LOG_STATE["lines"] += 1
+        try:
+            req = json.loads(line)
+        except Exception as e:
+            logger.warning(
+                "Skipping unreadable requirement log line",
+                extra={"path": STORE_LOG, "offset": _LOG_STATE["offset"], "error": str(e)},
+            )
+            continue
+        # Unflushed local changes are newer than anything on disk
+        if not req.get("id") or req["id"] in _DIRTY:
+            continue
+        if req.get("deleted"):
+            _INDEX.pop(req["id"], None)
+        else:
+            _INDEX[req["id"]] = req
+        _VERSION += 1
+    _LOG_STATE["offset"] += len(complete)
+
+def _read_legacy_file(entry, stat):
+    """
+    One JSON file per requirement was the previous format; such files can
+    still be dropped into the store. A new or modified file replaces the
+    requirement in the index and is appended to the log.
+    Returns the requirement id, or None if the file is unreadable.
+    """
+    try:
+        with open(entry.path, encoding="utf-8") as f:
+            req = json.load(f)
+        req_id = req["id"]
+    except Exception as e:
+        logger.warning(
+            "Skipping unreadable requirement file",
+            extra={"path": entry.path, "error": str(e)},
+        )
+        return None
+
+    source = {"name": entry.name, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    current = _INDEX.get(req_id)
+    if current is None or current.get("source_file") != source:
+        req["source_file"] = source
+        _mark_dirty(req)
+    return req_id
+
+def _forget_legacy_file(name, req_id):
+    """A deleted drop-in file removes the requirement it provided."""
+    req = _INDEX.get(req_id)
+    if req is not None and (req.get("source_file") or {}).get("name") == name:
+        _mark_deleted(req_id)
+
+def _refresh():
+    """One os.scandir pass; only the log tail and new or modified files are read."""
+    global _LOADED
+    with _LOCK:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        entries = sorted(os.scandir(STORE_DIR), key=lambda e: e.name)
+
+        log_entry = next((e for e in entries if e.path == STORE_LOG), None)
+        if log_entry is not None:
+            _read_log(log_entry.stat())
+
+        seen = set()
+        for entry in entries:
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            key = (stat.st_mtime_ns, stat.st_size)
+            seen.add(entry.name)
+            if entry.name in _MANIFEST and _MANIFEST[entry.name][0] == key:
+                continue
+            _MANIFEST[entry.name] = (key, _read_legacy_file(entry, stat))
+
+        for name in set(_MANIFEST) - seen:
+            _, req_id = _MANIFEST.pop(name)
+            _forget_legacy_file(name, req_id)
+
+        if not _LOADED:
+            # Files deleted while the app was not running
+            for req_id, req in list(_INDEX.items()):
+                name = (req.get("source_file") or {}).get("name")
+                if name and name not in seen:
+                    _forget_legacy_file(name, req_id)
+        _LOADED = True
 
 # -----------------------------
-# Load ALL requirements
+# Write-behind buffer
 # -----------------------------
-def load_all_requirements():
-    init_requirement_store()
+# Saves only mark a requirement dirty; a background thread appends all dirty
+# requirements as one batch at most FLUSH_DELAY seconds later. Saving the same
+# requirement several times in that window costs a single log line.
+FLUSH_DELAY = 0.5
 
-    for fname in os.listdir(STORE_DIR):
-        if not fname.endswith(".json"):
-            continue
+# Rewrite the log once it holds this many times more lines than requirements
+COMPACT_RATIO = 4
+COMPACT_MIN_LINES = 1000
+
+_DIRTY = {}
+_WAKE = threading.Event()
+_WRITE_LOCK = threading.Lock()
+_FLUSHER = None
+
+def _mark_dirty(*reqs):
+    global _VERSION
+    with _LOCK:
+        for req in reqs:
+            _INDEX[req["id"]] = req
+            _DIRTY[req["id"]] = req
+        _VERSION += 1
+        _start_flusher()
+    _WAKE.set()
+
+def _mark_deleted(req_id):
+    """Drop a requirement; a tombstone line makes the removal durable."""
+    global _VERSION
+    with _LOCK:
+        _INDEX.pop(req_id, None)
+        _DIRTY[req_id] = {"id": req_id, "deleted": True}
+        _VERSION += 1
+        _start_flusher()
+    _WAKE.set()
+
+def _start_flusher():
+    global _FLUSHER
+    if _FLUSHER is None:
+        _FLUSHER = threading.Thread(target=_flush_loop, name="requirement-flush", daemon=True)
+        _FLUSHER.start()
+
+def _flush_loop():
+    while True:
+        _WAKE.wait()
+        time.sleep(FLUSH_DELAY)
+        _WAKE.clear()
+        try:
+            flush_requirements()
+        except Exception as e:
+            logger.error("Requirement flush failed", extra={"path": STORE_LOG, "error": str(e)})
+
+def flush_requirements():
+    """Append all dirty requirements to the log in one write. Returns the count."""
+    with _WRITE_LOCK:
+        with _LOCK:
+            batch = list(_DIRTY.values())
+            data = "".join(json.dumps(req, ensure_ascii=False) + "\n" for req in batch).encode("utf-8")
+            _DIRTY.clear()
+        if not batch:
+            return 0
 
-        path = os.path.join(STORE_DIR, fname)
         try:
-            with open(path, encoding="utf-8") as f:
-                req = json.load(f)
-                req_id = req["id"]
+            _append_to_log(data, len(batch))
+        except Exception:
+            # Keep newer saves made meanwhile, retry the rest next time
+            with _LOCK:
+                for req in batch:
+                    _DIRTY.setdefault(req["id"], req)
+            _WAKE.set()
+            raise
+
+        if _LOG_STATE["lines"] > max(COMPACT_MIN_LINES, COMPACT_RATIO * len(_INDEX)):
+            with _LOCK:
+                _compact_locked()
+        return len(batch)
+
+def _append_to_log(data, lines):
+    with open(STORE_LOG, "a+b") as f:
+        f.seek(0, os.SEEK_END)
+        start = f.tell()
+        if start:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        end = f.tell()
+        inode = os.fstat(f.fileno()).st_ino
+
+    with _LOCK:
+        # Nothing else was appended since our last read: skip re-reading our own lines
+        if inode == _LOG_STATE["inode"] and start == _LOG_STATE["offset"]:
+            _LOG_STATE["offset"] = end
+            _LOG_STATE["lines"] += lines
+
+def compact_requirements():
+    """
+    Rewrite the log with one line per requirement via temp file and rename,
+    so a crash leaves either the old or the new log, never a partial one.
+    Lines appended by other processes since our last refresh are read first.
+    """
+    with _WRITE_LOCK, _LOCK:
+        _compact_locked()
 
-                if req_id not in st.session_state.requirements:
-                    st.session_state.requirements[req_id] = req
+def _compact_locked():
+    """Caller holds _WRITE_LOCK and _LOCK."""
+    if os.path.exists(STORE_LOG):
+        _read_log(os.stat(STORE_LOG))
+
+    tmp_path = f"{STORE_LOG}.tmp"
+    with open(tmp_path, "wb") as f:
+        for req in _INDEX.values():
+            f.write((json.dumps(req, ensure_ascii=False) + "\n").encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp_path, STORE_LOG)
+
+    stat = os.stat(STORE_LOG)
+    _LOG_STATE.update(inode=stat.st_ino, offset=size, lines=len(_INDEX))
+
+atexit.register(flush_requirements)
+
+# -----------------------------
+# Filesystem watcher
+# -----------------------------
+# Changes to requirement_store/ (other processes appending to the log, files
+# dropped in, edited or deleted) are applied to the shared index shortly after
+# they happen, so reruns do not have to rescan the directory.
+WATCH_DEBOUNCE = 0.3
+
+_WATCHED_EVENTS = {"created", "modified", "deleted", "moved"}
+_WATCH = {"observer": None, "timer": None, "started": False}
+_WATCH_LOCK = threading.Lock()
+
+class _StoreEventHandler(FileSystemEventHandler):
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in _WATCHED_EVENTS:
+            return
+        paths = (event.src_path, getattr(event, "dest_path", "") or "")
+        if any(str(p).endswith((".json", ".jsonl")) for p in paths):
+            _schedule_refresh()
+
+def _schedule_refresh():
+    """Debounce bursts of events into one incremental refresh."""
+    with _WATCH_LOCK:
+        if _WATCH["timer"] is not None:
+            _WATCH["timer"].cancel()
+        timer = threading.Timer(WATCH_DEBOUNCE, _watched_refresh)
+        timer.daemon = True
+        _WATCH["timer"] = timer
+        timer.start()
+
+def _watched_refresh():
+    try:
+        _refresh()
+    except Exception as e:
+        logger.error("Requirement store refresh failed", extra={"path": STORE_DIR, "error": str(e)})
+
+def start_requirement_watcher():
+    """Start the process-wide observer once. Returns True if it is running."""
+    with _WATCH_LOCK:
+        if _WATCH["started"]:
+            return _WATCH["observer"] is not None
+        _WATCH["started"] = True
+        if Observer is None:
+            return False
+        try:
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(_StoreEventHandler(), STORE_DIR, recursive=False)
+            observer.start()
         except Exception as e:
-            print(f"Error loading {fname}: {e}")
+            logger.warning("Requirement store watcher unavailable", extra={"path": STORE_DIR, "error": str(e)})
+            return False
+        _WATCH["observer"] = observer
+        atexit.register(observer.stop)
+        return True
+
+# -----------------------------
+# Init
+# -----------------------------
+def init_requirement_store():
+    if not _LOADED:
+        _refresh()
+    if not _WATCH["started"]:
+        start_requirement_watcher()
+    if st.session_state.get("requirements") is not _INDEX:
+        st.session_state.requirements = _INDEX
+
+# -----------------------------
+# Load ALL requirements
+# -----------------------------
+def load_all_requirements():
+    """
+    Called on every rerun. With the watcher running the shared index is
+    already current; otherwise this stats the store and reads what changed
+    on disk since the last call.
+    """
+    if _WATCH["observer"] is None:
+        _refresh()
+    init_requirement_store()
 
 # -----------------------------
 # Save
 # -----------------------------
 def save_requirement(req):
-    path = os.path.join(STORE_DIR, f"{req['id']}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(req, f, indent=2, ensure_ascii=False)
+    """Buffered: the requirement is persisted by the background flush."""
+    init_requirement_store()
+    _mark_dirty(req)
+
+def register_requirements(reqs):
+    """
+    Render-path registration: only requirements whose ID is not in the
+    process-wide index yet are persisted, all in the same flush batch.
+    Returns the newly registered requirements.
+    """
+    init_requirement_store()
+    with _LOCK:
+        new = [req for req in reqs if req["id"] not in _INDEX]
+        if new:
+            _mark_dirty(*new)
+    return new
 
 # -----------------------------
 # History
 # -----------------------------
 def add_requirement_event(req_id, action, actor, details=None):
-    req = st.session_state.requirements.get(req_id)
-    if not req:
-        return
+    """
+    The flush thread serializes dirty requirements under _LOCK, so the
+    history append and the dirty mark happen under it as well.
+    """
+    init_requirement_store()
+    with _LOCK:
+        req = _INDEX.get(req_id)
+        if not req:
+            return
 
-    req["history"].append({
-        "timestamp": datetime.now().isoformat(),
-        "action": action,
-        "actor": actor,
-        "details": details or {}
-    })
+        req["history"].append({
+            "timestamp": datetime.now().isoformat(),
+            "action": action,
+            "actor": actor,
+            "details": details or {}
+        })
 
-    save_requirement(req)
+        _mark_dirty(req)
 
 # -----------------------------
 # Query
@@ -65,3 +401,75 @@ def add_requirement_event(req_id, action, actor, details=None):
 def get_all_requirements():
     init_requirement_store()
     return list(st.session_state.requirements.values())
+
+# -----------------------------
+# Overview aggregates
+# -----------------------------
+FILTER_FIELDS = ("page", "section", "type", "status")
+
+_SUMMARY = {"version": None}
+
+def requirement_page(req):
+    """Page a requirement was rendered on; older records only encode it in the ID."""
+    if req.get("page"):
+        return req["page"]
+    suffix = f"_{(req.get('section') or '').replace(' ', '_')}_{req.get('type')}_"
+    prefix = req["id"].rsplit("_", 1)[0] + "_"
+    if prefix.endswith(suffix):
+        return req["id"][:len(prefix) - len(suffix)]
+    return "unknown_page"
+
+def get_requirement_summary():
+    """
+    Counts and filter indexes over all requirements, rebuilt only when the
+    index changed since the last call:
+
+    {"total", "history_events", "ids" (in index order),
+     "counts": {field: {value: n}}, "index": {field: {value: set(ids)}}}
+    """
+    global _SUMMARY
+    init_requirement_store()
+    with _LOCK:
+        if _SUMMARY["version"] == _VERSION:
+            return _SUMMARY
+
+        counts = {f: {} for f in FILTER_FIELDS}
+        index = {f: {} for f in FILTER_FIELDS}
+        history_events = 0
+        for req_id, req in _INDEX.items():
+            values = {
+                "page": requirement_page(req),
+                "section": req.get("section") or "",
+                "type": req.get("type") or "",
+                "status": req.get("status") or "",
+            }
+            for f, value in values.items():
+                counts[f][value] = counts[f].get(value, 0) + 1
+                index[f].setdefault(value, set()).add(req_id)
+            history_events += len(req.get("history", []))
+
+        _SUMMARY = {
+            "version": _VERSION,
+            "total": len(_INDEX),
+            "history_events": history_events,
+            "ids": list(_INDEX),
+            "counts": counts,
+            "index": index,
+        }
+        return _SUMMARY
+
+def filter_requirement_ids(filters):
+    """
+    filters: {field: [values]}; empty selections are ignored.
+    Returns matching IDs in index order.
+    """
+    summary = get_requirement_summary()
+    selected = None
+    for f, values in filters.items():
+        if not values:
+            continue
+        ids = set().union(*(summary["index"][f].get(v, set()) for v in values))
+        selected = ids if selected is None else selected & ids
+    if selected is None:
+        return summary["ids"]
+    return [req_id for req_id in summary["ids"] if req_id in selected]
@@ -0,0 +1,84 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from state.ticket_lifecycle import TransitionEvent
+
+# =====================================================
+# Ticket event bus
+# =====================================================
+# Every ticket mutation is published here exactly once. Derived structures
+# (indexes, counters, ...) subscribe once per process and update
+# incrementally from the events instead of rescanning the ticket list.
+
+
+@dataclass(frozen=True)
+class TicketEvent:
+    ticket_id: str
+    action: str
+    actor: str
+    timestamp: str
+    details: dict = field(default_factory=dict)
+    transition: TransitionEvent | None = None
+
+
+# name -> (on_events(items), on_reset(tickets) or None)
+_SUBSCRIBERS = {}
+
+# Batch buffers are per thread, i.e. per Streamlit script run
+_local = threading.local()
+
+
+def subscribe(name, on_events, on_reset=None):
+    """
+    Register a subscriber under a unique name (re-registering replaces it).
+
+    on_events([(ticket, TicketEvent), ...]) receives events in batches.
+    on_reset(tickets) is called when the whole ticket list is replaced and
+    derived state has to be rebuilt from scratch.
+    """
+    _SUBSCRIBERS[name] = (on_events, on_reset)
+
+
+def unsubscribe(name):
+    _SUBSCRIBERS.pop(name, None)
+
+
+def publish(ticket, event):
+    """Publish one event; delivered at the end of the enclosing batch, if any."""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is not None:
+        buffer.append((ticket, event))
+    else:
+        _dispatch([(ticket, event)])
+
+
+@contextmanager
+def batch():
+    """
+    Collect all events published inside the block and deliver them to each
+    subscriber as a single list when the outermost block exits.
+    """
+    if getattr(_local, "buffer", None) is not None:
+        yield
+        return
+
+    _local.buffer = []
+    try:
+        yield
+        items = _local.buffer
+    finally:
+        _local.buffer = None
+    if items:
+        _dispatch(items)
+
+
+def reset(tickets):
+    for _, on_reset in list(_SUBSCRIBERS.values()):
+        if on_reset:
+            on_reset(tickets)
+
+
+def _dispatch(items):
+    for on_events, _ in list(_SUBSCRIBERS.values()):
+        on_events(items)
@@ -0,0 +1,384 @@
+import csv
+import hashlib
+import io
+import json
+import os
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+from state.tickets import TICKET_STATUSES, build_ticket, get_all_tickets, insert_tickets
+
+# -------------------------
+# FIELD MAPPING
+# -------------------------
+# Legacy ITSM column -> ticket field. Matching is case-insensitive.
+DEFAULT_FIELD_MAP = {
+    "ticket_id": "ticket_id",
+    "number": "ticket_id",
+    "id": "ticket_id",
+    "application": "application",
+    "software": "application",
+    "software_name": "application",
+    "reason": "reason",
+    "justification": "reason",
+    "description": "reason",
+    "status": "status",
+    "state": "status",
+    "created_by": "created_by",
+    "requested_by": "created_by",
+    "opened_by": "created_by",
+    "date": "date",
+    "opened_at": "date",
+    "created": "date",
+    "urgency": "urgency",
+    "priority": "urgency",
+    "vendor": "vendor",
+    "license_type": "license_type",
+    "source": "source",
+    "journey": "journey",
+}
+
+# Legacy status -> lifecycle status
+DEFAULT_STATUS_MAP = {
+    "new": "DRAFT",
+    "open": "DRAFT",
+    "in progress": "ARCH_REVIEW_IN_PROGRESS",
+    "resolved": "APPROVED",
+    "closed": "APPROVED",
+    "approved": "APPROVED",
+    "rejected": "REJECTED",
+    "cancelled": "REJECTED",
+}
+
+# -------------------------
+# SCHEMA (compiled once)
+# -------------------------
+TICKET_IMPORT_SCHEMA = {
+    "ticket_id": {"type": str},
+    "application": {"type": str, "required": True},
+    "reason": {"type": str, "required": True},
+    "status": {"type": str, "allowed": TICKET_STATUSES},
+    "created_by": {"type": str},
+    "date": {"type": str},
+    "urgency": {"type": str},
+}
+
+
+def _compile_schema(schema):
+    """
+    Turn the schema dict into a flat tuple of checks so per-row validation
+    is a single loop without dict lookups or branching on rule kinds.
+    """
+    checks = []
+    for field, rule in schema.items():
+        allowed = frozenset(rule["allowed"]) if "allowed" in rule else None
+        checks.append((field, rule.get("type", str), rule.get("required", False), allowed))
+    return tuple(checks)
+
+
+_COMPILED_SCHEMA = _compile_schema(TICKET_IMPORT_SCHEMA)
+
+
+def validate_record(record):
+    """Return a list of error strings for a mapped record (empty if valid)."""
+    errors = []
+    for field, expected_type, required, allowed in _COMPILED_SCHEMA:
+        value = record.get(field)
+        if value is None or value == "":
+            if required:
+                errors.append(f"missing '{field}'")
+            continue
+        if not isinstance(value, expected_type):
+            errors.append(f"'{field}' must be {expected_type.__name__}")
+        elif allowed is not None and value not in allowed:
+            errors.append(f"invalid {field} '{value}'")
+    return errors
+
+# -------------------------
+# STREAMING READERS
+# -------------------------
+@contextmanager
+def _open_text(source):
+    """
+    Text stream over `source`. Files opened from a path are closed on exit;
+    file-like sources stay open for the caller.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            yield f
+    elif isinstance(source, io.TextIOBase):
+        yield source
+    else:
+        # Binary file-like (e.g. Streamlit UploadedFile)
+        wrapper = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+        try:
+            yield wrapper
+        finally:
+            # Detached, so discarding the wrapper does not close the upload
+            wrapper.detach()
+
+
+def iter_csv_rows(source, delimiter=None):
+    with _open_text(source) as f:
+        if delimiter is None:
+            sample = f.readline()
+            delimiter = max(";,\t", key=sample.count)
+            reader = csv.DictReader(_chain_line(sample, f), delimiter=delimiter)
+        else:
+            reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            yield row
+
+
+def _chain_line(first_line, f):
+    yield first_line
+    yield from f
+
+
+def iter_jsonl_rows(source):
+    with _open_text(source) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_xlsx_rows(source):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        for values in rows:
+            yield {h: v for h, v in zip(header, values) if h}
+    finally:
+        workbook.close()
+
+
+READERS = {
+    "csv": iter_csv_rows,
+    "jsonl": iter_jsonl_rows,
+    "xlsx": iter_xlsx_rows,
+}
+
+
+def detect_format(filename):
+    ext = os.path.splitext(filename)[1].lower().lstrip(".")
+    if ext == "json":
+        ext = "jsonl"
+    if ext not in READERS:
+        raise ValueError(f"Unsupported import format '{ext}', expected one of {list(READERS)}")
+    return ext
+
+# -------------------------
+# MAPPING
+# -------------------------
+def map_record(row, field_map=None, status_map=None):
+    """Map a raw export row onto ticket fields."""
+    field_map = field_map or DEFAULT_FIELD_MAP
+    status_map = status_map or DEFAULT_STATUS_MAP
+
+    record = {}
+    extra = {}
+    for column, value in row.items():
+        if column is None:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, str):
+            value = value.strip()
+        elif value is not None and not isinstance(value, (bool, list, dict)):
+            value = str(value)
+
+        target = field_map.get(column.strip().lower())
+        if target and target not in record:
+            record[target] = value
+        elif value not in (None, ""):
+            extra[column] = value
+
+    status = record.get("status")
+    if status:
+        record["status"] = status_map.get(status.lower(), status)
+
+    record["legacy_fields"] = extra
+    return record
+
+
+def _record_to_ticket(record, source_name):
+    extra = {"urgency": record.get("urgency") or "Normal"}
+    for key in ("vendor", "license_type"):
+        if record.get(key):
+            extra[key] = record[key]
+
+    ticket = build_ticket(
+        source=record.get("source") or "Legacy ITSM Import",
+        application=record["application"],
+        reason=record["reason"],
+        status=record.get("status") or "DRAFT",
+        journey=record.get("journey") or "legacy_import",
+        created_by=record.get("created_by") or "unknown",
+        extra=extra,
+        metadata={"import_source": source_name, "legacy_fields": record["legacy_fields"]},
+        ticket_id=record.get("ticket_id"),
+        date=record.get("date"),
+    )
+    ticket["history"].append({
+        "action": "Imported from legacy ITSM",
+        "actor": "system",
+        "timestamp": ticket["date"],
+        "details": {"import_source": source_name},
+    })
+    return ticket
+
+# -------------------------
+# CHECKPOINTS
+# -------------------------
+def source_fingerprint(source):
+    """sha1 of the export's content; a checkpoint only resumes the same file."""
+    digest = hashlib.sha1()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    elif hasattr(source, "getvalue"):
+        data = source.getvalue()
+        digest.update(data.encode("utf-8") if isinstance(data, str) else data)
+    else:
+        position = source.tell()
+        while block := source.read(1 << 20):
+            digest.update(block.encode("utf-8") if isinstance(block, str) else block)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+def _new_checkpoint(fingerprint):
+    return {
+        "fingerprint": fingerprint,
+        "rows_done": 0,
+        "imported": 0,
+        "skipped": 0,
+        "errors": 0,
+        "ticket_ids": [],
+    }
+
+
+def load_checkpoint(path, fingerprint=None, existing_ids=None):
+    """
+    Checkpoint for `path`, or a fresh one when there is none, it belongs to
+    another file, or the tickets it imported are not in the store (e.g. a
+    new session): resuming would then skip rows that were never inserted.
+    """
+    if not path or not os.path.exists(path):
+        return _new_checkpoint(fingerprint)
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get("fingerprint") != fingerprint or "ticket_ids" not in checkpoint:
+        return _new_checkpoint(fingerprint)
+    if existing_ids is not None and not all(tid in existing_ids for tid in checkpoint["ticket_ids"]):
+        return _new_checkpoint(fingerprint)
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+# -------------------------
+# IMPORT
+# -------------------------
+def import_tickets(
+    source,
+    fmt=None,
+    source_name=None,
+    field_map=None,
+    status_map=None,
+    chunk_size=1000,
+    checkpoint_path=None,
+    fingerprint=None,
+    on_progress=None,
+    max_errors=100
+):
+    """
+    Stream a legacy export into the ticket store.
+
+    Rows are mapped, validated and inserted in chunks of `chunk_size`.
+    After every chunk the number of consumed rows and the imported ticket
+    IDs are written to `checkpoint_path`, so a rerun on the same file
+    resumes after the last committed chunk as long as those tickets are
+    still in the store. The checkpoint is removed once the import finishes.
+    `fingerprint` is the source's source_fingerprint() if the caller already
+    has it; otherwise it is computed here when checkpointing.
+    Tickets whose ID already exists are skipped.
+
+    Returns a summary dict with counts and the first `max_errors` errors.
+    """
+    source_name = source_name or getattr(source, "name", None) or str(source)
+    fmt = fmt or detect_format(source_name)
+    rows = READERS[fmt](source)
+
+    existing_ids = {t["ticket_id"] for t in get_all_tickets()}
+    if checkpoint_path and fingerprint is None:
+        fingerprint = source_fingerprint(source)
+    checkpoint = load_checkpoint(checkpoint_path, fingerprint, existing_ids)
+    rows_to_skip = checkpoint["rows_done"]
+    errors = []
+    chunk = []
+
+    def commit_chunk(rows_done):
+        insert_tickets(chunk)
+        checkpoint["imported"] += len(chunk)
+        checkpoint["ticket_ids"].extend(t["ticket_id"] for t in chunk)
+        checkpoint["rows_done"] = rows_done
+        save_checkpoint(checkpoint_path, checkpoint)
+        chunk.clear()
+        if on_progress:
+            on_progress(checkpoint)
+
+    row_no = 0
+    # Closes a source file opened from a path even if a row raises
+    with closing(rows):
+        for row_no, row in enumerate(rows, start=1):
+            if row_no <= rows_to_skip:
+                continue
+
+            record = map_record(row, field_map, status_map)
+            problems = validate_record(record)
+            if problems:
+                checkpoint["errors"] += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": row_no, "errors": problems})
+            elif record.get("ticket_id") in existing_ids:
+                checkpoint["skipped"] += 1
+            else:
+                ticket = _record_to_ticket(record, source_name)
+                existing_ids.add(ticket["ticket_id"])
+                chunk.append(ticket)
+
+            if row_no % chunk_size == 0:
+                commit_chunk(row_no)
+
+    if row_no > checkpoint["rows_done"]:
+        commit_chunk(row_no)
+    clear_checkpoint(checkpoint_path)
+
+    return {
+        "source": source_name,
+        "format": fmt,
+        "resumed_after": rows_to_skip,
+        "rows_done": checkpoint["rows_done"],
+        "imported": checkpoint["imported"],
+        "skipped": checkpoint["skipped"],
+        "errors": checkpoint["errors"],
+        "error_samples": errors,
+    }
@@ -0,0 +1,205 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+# =====================================================
+# Ticket lifecycle (declarative)
+# =====================================================
+# Every status a page may set. "closed" tickets no longer collect
+# duplicate requests and are final: no transition leaves them.
+TICKET_LIFECYCLE = {
+    # Intake
+    "DRAFT":                       {"closed": False},
+    "Created":                     {"closed": False},
+    "Submitted for Review":        {"closed": False},
+    "Pending EPM / IS Review":     {"closed": False},
+    "Submitted to EPM":            {"closed": False},
+    "Pending IS-P Review":         {"closed": False},
+
+    # Shop Artikel / department reviews
+    "Shop Artikel Completed":      {"closed": False},
+    "Pending Department Review":   {"closed": False},
+    "PENDING":                     {"closed": False},
+
+    # Architecture
+    "ARCH_REVIEW_IN_PROGRESS":     {"closed": False},
+    "DOMAIN_CAPABILITY_FINALIZED": {"closed": False},
+
+    # PV
+    "PV_CONTEXT_REQUIRED":         {"closed": False},
+    "PV_CONTEXT_PROVIDED":         {"closed": False},
+    "PV_RESP_FINALIZATION":        {"closed": False},
+    "PV_NOT_REQUIRED":             {"closed": False},
+    "PV_ASSIGNED":                 {"closed": False},
+
+    # Final
+    "APPROVED":                    {"closed": True},
+    "REJECTED":                    {"closed": True},
+}
+
+ANY = "*"
+
+INTAKE_STATUSES = [
+    "DRAFT",
+    "Created",
+    "Submitted for Review",
+    "Pending EPM / IS Review",
+    "Submitted to EPM",
+    "Pending IS-P Review",
+]
+
+DEPARTMENT_REVIEW_STATUSES = ["Pending Department Review", "PENDING"]
+FINAL_DECISIONS = ["APPROVED", "REJECTED", "PENDING"]
+ARCH_REVIEW_STATUSES = ["ARCH_REVIEW_IN_PROGRESS", "DOMAIN_CAPABILITY_FINALIZED"]
+PV_CONTEXT_STATUSES = ["PV_CONTEXT_REQUIRED", "PV_CONTEXT_PROVIDED"]
+PV_DECISIONS = ["PV_RESP_FINALIZATION", "PV_NOT_REQUIRED"]
+
+# (from statuses, to statuses). Re-applying the current status is always
+# allowed. Sources are listed explicitly; APPROVED / REJECTED are never one.
+TICKET_TRANSITIONS = [
+    # 1 / 0b / 0c: request submitted, red scanner email sent
+    (INTAKE_STATUSES, INTAKE_STATUSES),
+
+    # 5: Shop Artikel decision on the latest ticket, may be repeated
+    (INTAKE_STATUSES + DEPARTMENT_REVIEW_STATUSES, ["Shop Artikel Completed"]),
+    (["Shop Artikel Completed"], ["Pending Department Review"]),
+
+    # 8: final greylist decision, may be re-applied while reviews are PENDING
+    (["Shop Artikel Completed"] + DEPARTMENT_REVIEW_STATUSES, FINAL_DECISIONS),
+
+    # 14: architecture review of greylist / IS-P tickets
+    (INTAKE_STATUSES + DEPARTMENT_REVIEW_STATUSES, ARCH_REVIEW_STATUSES + ["PV_CONTEXT_REQUIRED"]),
+    (["ARCH_REVIEW_IN_PROGRESS"], ["DOMAIN_CAPABILITY_FINALIZED", "PV_CONTEXT_REQUIRED"]),
+    (["DOMAIN_CAPABILITY_FINALIZED"], ["PV_CONTEXT_REQUIRED"]),
+
+    # 3: user provides PV context
+    (["PV_CONTEXT_REQUIRED"], ["PV_CONTEXT_PROVIDED"]),
+
+    # 22 / batch derivation: PV eligibility and obligations, re-evaluated
+    # until a PV is assigned
+    (["DOMAIN_CAPABILITY_FINALIZED"] + PV_CONTEXT_STATUSES + PV_DECISIONS, PV_DECISIONS),
+
+    # PV workload: balanced assignment; 17: PV accepts / rejects responsibility
+    (["PV_RESP_FINALIZATION"], ["PV_ASSIGNED", "APPROVED", "REJECTED"]),
+    (["PV_ASSIGNED", "PV_NOT_REQUIRED"], ["APPROVED", "REJECTED"]),
+
+    # Rejection while the architecture / PV review is still running
+    (ARCH_REVIEW_STATUSES + PV_CONTEXT_STATUSES, ["REJECTED"]),
+]
+
+
+class InvalidTransitionError(ValueError):
+    """Raised for unknown statuses, disallowed transitions and failed guards."""
+
+
+@dataclass(frozen=True)
+class TransitionEvent:
+    ticket_id: str
+    from_status: str
+    to_status: str
+    actor: str
+    action: str
+    timestamp: str
+
+# =====================================================
+# Compilation
+# =====================================================
+def compile_transitions(lifecycle, transitions):
+    """
+    Compile the declarative transitions into a lookup table
+    {from_status: frozenset(to_statuses)}.
+    """
+    statuses = list(lifecycle)
+    table = {status: {status} for status in statuses}
+
+    for sources, targets in transitions:
+        sources = statuses if sources == ANY else sources
+        for status in list(sources) + list(targets):
+            if status not in lifecycle:
+                raise InvalidTransitionError(f"Transition uses undeclared status '{status}'")
+        for source in sources:
+            table[source].update(targets)
+
+    return {status: frozenset(targets) for status, targets in table.items()}
+
+
+TRANSITION_TABLE = compile_transitions(TICKET_LIFECYCLE, TICKET_TRANSITIONS)
+CLOSED_STATUSES = frozenset(s for s, spec in TICKET_LIFECYCLE.items() if spec["closed"])
+
+# =====================================================
+# Guards
+# =====================================================
+# (from_status or ANY, to_status or ANY) -> [guard(ticket) -> error message or None]
+_GUARDS = {}
+
+
+def register_transition_guard(from_status, to_status, guard):
+    _GUARDS.setdefault((from_status, to_status), []).append(guard)
+
+
+def _require_derived_obligations(ticket):
+    if not ticket.get("derived_obligations"):
+        return "derived PV obligations must be saved first"
+    return None
+
+
+register_transition_guard(ANY, "PV_RESP_FINALIZATION", _require_derived_obligations)
+
+# =====================================================
+# Validation
+# =====================================================
+def check_transition(ticket, to_status):
+    """Return an error message if ticket may not move to to_status, else None."""
+    if to_status not in TICKET_LIFECYCLE:
+        return f"Invalid status '{to_status}', must be one of {list(TICKET_LIFECYCLE)}"
+
+    from_status = ticket.get("status")
+    if from_status is None or from_status == to_status:
+        return None
+
+    if from_status in TRANSITION_TABLE and to_status not in TRANSITION_TABLE[from_status]:
+        return f"Transition '{from_status}' → '{to_status}' is not allowed"
+
+    for key in ((from_status, to_status), (ANY, to_status), (from_status, ANY)):
+        for guard in _GUARDS.get(key, ()):
+            error = guard(ticket)
+            if error:
+                return f"Transition '{from_status}' → '{to_status}' blocked: {error}"
+    return None
+
+
+def validate_transitions(requests):
+    """
+    Batch validation for [(ticket, to_status), ...].
+    Returns [(ticket_id, error), ...] for the rejected ones; nothing is applied.
+    """
+    errors = []
+    for ticket, to_status in requests:
+        error = check_transition(ticket, to_status)
+        if error:
+            errors.append((ticket.get("ticket_id"), error))
+    return errors
+
+
+def apply_transition(ticket, to_status, actor, action):
+    """
+    Validate and apply a status change.
+    Returns the TransitionEvent, or None if the status did not change.
+    Tickets with a legacy status outside the lifecycle may move to any status.
+    """
+    error = check_transition(ticket, to_status)
+    if error:
+        raise InvalidTransitionError(error)
+
+    from_status = ticket.get("status")
+    if from_status == to_status:
+        return None
+
+    ticket["status"] = to_status
+    return TransitionEvent(
+        ticket_id=ticket.get("ticket_id"),
+        from_status=from_status,
+        to_status=to_status,
+        actor=actor,
+        action=action,
+        timestamp=datetime.now().isoformat(),
+    )
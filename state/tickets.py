@@ -1,20 +1,26 @@
 import streamlit as st
+import copy
+import re
 import uuid
 from datetime import datetime
 
+from state import ticket_events
+from state.ticket_events import TicketEvent
+from state.ticket_lifecycle import (
+    TICKET_LIFECYCLE,
+    CLOSED_STATUSES,
+    TransitionEvent,
+    apply_transition,
+)
+
 # -------------------------
 # TICKET LIFECYCLE STATUSES
 # -------------------------
-TICKET_STATUSES = [
-    "DRAFT",
-    "ARCH_REVIEW_IN_PROGRESS",
-    "DOMAIN_CAPABILITY_FINALIZED",
-    "PV_CONTEXT_REQUIRED",
-    "PV_RESP_FINALIZATION",
-    "PV_ASSIGNED",
-    "APPROVED",
-    "REJECTED",
-]
+# Statuses and allowed transitions are declared in state/ticket_lifecycle.py
+TICKET_STATUSES = list(TICKET_LIFECYCLE)
+
+# Tickets in these statuses no longer collect duplicate requests
+CLOSED_TICKET_STATUSES = CLOSED_STATUSES
 
 # -------------------------
 # PV CONTEXT TEMPLATE
@@ -57,11 +63,114 @@ def init_tickets():
         st.session_state.tickets = []
     if "latest_ticket" not in st.session_state:
         st.session_state.latest_ticket = None
+    if "ticket_index" not in st.session_state or "ticket_status_counts" not in st.session_state:
+        _rebuild_ticket_indexes(st.session_state.tickets)
+
+# -------------------------
+# INDEXES
+# -------------------------
+def normalize_application(name):
+    """
+    Normalize an application name for duplicate detection:
+    case-insensitive, punctuation and repeated whitespace ignored.
+    """
+    return " ".join(re.sub(r"[^\w]+", " ", (name or "").lower()).split())
+
+def _rebuild_ticket_indexes(ticket_list):
+    """
+    Rebuild ticket_index (ticket_id -> ticket) and let event subscribers
+    rebuild their derived state from the full list.
+    """
+    st.session_state.ticket_index = {}
+    for t in ticket_list:
+        _index_ticket(t)
+    ticket_events.reset(ticket_list)
+
+def _index_ticket(ticket):
+    st.session_state.ticket_index[ticket["ticket_id"]] = ticket
+
+def _open_index_on_events(items):
+    """
+    open_ticket_index: normalized application -> {ticket_id: None} of every
+    open ticket, oldest first (a dict keeps insertion order)
+    """
+    if "open_ticket_index" not in st.session_state:
+        return
+    index = st.session_state.open_ticket_index
+    for ticket, event in items:
+        if event.transition is None:
+            continue
+        key = normalize_application(ticket.get("application"))
+        if not key:
+            continue
+        if event.transition.to_status in CLOSED_TICKET_STATUSES:
+            open_ids = index.get(key)
+            if open_ids is not None:
+                open_ids.pop(ticket["ticket_id"], None)
+                if not open_ids:
+                    del index[key]
+        else:
+            index.setdefault(key, {})[ticket["ticket_id"]] = None
+
+def _open_index_on_reset(ticket_list):
+    index = {}
+    for t in ticket_list:
+        key = normalize_application(t.get("application"))
+        if key and t.get("status") not in CLOSED_TICKET_STATUSES:
+            index.setdefault(key, {})[t["ticket_id"]] = None
+    st.session_state.open_ticket_index = index
+
+def _status_counts_on_events(items):
+    """ticket_status_counts: status -> number of tickets"""
+    if "ticket_status_counts" not in st.session_state:
+        return
+    counts = st.session_state.ticket_status_counts
+    for _, event in items:
+        transition = event.transition
+        if transition is None:
+            continue
+        if transition.from_status is not None:
+            counts[transition.from_status] = counts.get(transition.from_status, 0) - 1
+        counts[transition.to_status] = counts.get(transition.to_status, 0) + 1
+
+def _status_counts_on_reset(ticket_list):
+    counts = {}
+    for t in ticket_list:
+        counts[t.get("status")] = counts.get(t.get("status"), 0) + 1
+    st.session_state.ticket_status_counts = counts
+
+ticket_events.subscribe("open_ticket_index", _open_index_on_events, _open_index_on_reset)
+ticket_events.subscribe("ticket_status_counts", _status_counts_on_events, _status_counts_on_reset)
+
+def get_status_counts():
+    init_tickets()
+    return {s: n for s, n in st.session_state.ticket_status_counts.items() if n > 0}
+
+def find_open_ticket(application):
+    """
+    Return the oldest open ticket for the same normalized application, or
+    None. Index entries whose ticket has been closed in the meantime are
+    dropped, so the next open ticket of the application takes over.
+    """
+    init_tickets()
+    key = normalize_application(application)
+    open_ids = st.session_state.open_ticket_index.get(key)
+    if not open_ids:
+        return None
+
+    for ticket_id in list(open_ids):
+        ticket = st.session_state.ticket_index.get(ticket_id)
+        if ticket is not None and ticket.get("status") not in CLOSED_TICKET_STATUSES:
+            return ticket
+        del open_ids[ticket_id]
+
+    del st.session_state.open_ticket_index[key]
+    return None
 
 # -------------------------
 # CREATE TICKET
 # -------------------------
-def create_ticket(
+def build_ticket(
     source,
     application,
     reason,
@@ -69,21 +178,17 @@ def create_ticket(
     journey=None,
     created_by=None,
     extra=None,
-    metadata=None
+    metadata=None,
+    ticket_id=None,
+    date=None
 ):
     """
-    Create a new ticket and store in session state.
-    Backward compatible with older pages.
+    Build a ticket dict without storing it.
+    Shared by create_ticket and the bulk importer.
     """
-    init_tickets()
-
-    created_by = created_by or st.session_state.get(
-        "epm_username",
-        st.session_state.get("device_username", "unknown"),
-    )
-
     ticket = {
-        "ticket_id": f"TICKET-{uuid.uuid4().hex[:8].upper()}",
+        "ticket_id": ticket_id or f"TICKET-{uuid.uuid4().hex[:8].upper()}",
+        "version": 1,
         "source": source,
         "application": application,
         "reason": reason,
@@ -91,7 +196,7 @@ def create_ticket(
         "journey": journey,
         "created_by": created_by,
         "urgency": extra.get("urgency", "Normal") if extra else "Normal",
-        "date": datetime.now().isoformat(),
+        "date": date or datetime.now().isoformat(),
 
         # Optional metadata
         "metadata": metadata or {},
@@ -111,10 +216,124 @@ def create_ticket(
     if extra:
         ticket.update(extra)
 
+    return ticket
+
+def create_ticket(
+    source,
+    application,
+    reason,
+    status="DRAFT",
+    journey=None,
+    created_by=None,
+    extra=None,
+    metadata=None
+):
+    """
+    Create a new ticket and store in session state.
+    Backward compatible with older pages.
+    """
+    init_tickets()
+
+    created_by = created_by or st.session_state.get(
+        "epm_username",
+        st.session_state.get("device_username", "unknown"),
+    )
+
+    ticket = build_ticket(
+        source=source,
+        application=application,
+        reason=reason,
+        status=status,
+        journey=journey,
+        created_by=created_by,
+        extra=extra,
+        metadata=metadata,
+    )
+
     st.session_state.tickets.append(ticket)
     st.session_state.latest_ticket = ticket
+    _index_ticket(ticket)
+    ticket_events.publish(ticket, _creation_event(ticket))
     return ticket
 
+def _creation_event(ticket):
+    return TicketEvent(
+        ticket_id=ticket["ticket_id"],
+        action="Ticket created",
+        actor=ticket.get("created_by"),
+        timestamp=ticket["date"],
+        details={"source": ticket.get("source")},
+        transition=TransitionEvent(
+            ticket_id=ticket["ticket_id"],
+            from_status=None,
+            to_status=ticket.get("status"),
+            actor=ticket.get("created_by"),
+            action="Ticket created",
+            timestamp=ticket["date"],
+        ),
+    )
+
+def create_or_join_ticket(source, application, reason, created_by, **kwargs):
+    """
+    Create a ticket unless an open ticket for the same application exists.
+    On a hit the requester is attached to the existing ticket instead, so
+    reviewers see one ticket per application with a request count.
+
+    Returns (ticket, joined).
+    """
+    existing = find_open_ticket(application)
+    if existing is None:
+        ticket = create_ticket(
+            source=source,
+            application=application,
+            reason=reason,
+            created_by=created_by,
+            **kwargs
+        )
+        return ticket, False
+
+    add_ticket_subscriber(existing, created_by, reason, source)
+    st.session_state.latest_ticket = existing
+    return existing, True
+
+def add_ticket_subscriber(ticket, username, reason, source):
+    """
+    Attach a (duplicate) requester to a ticket.
+    Each user is listed once; every request counts as an upvote.
+    """
+    subscribers = ticket.setdefault("subscribers", [])
+    if ticket.get("created_by") != username and all(s["username"] != username for s in subscribers):
+        subscribers.append({
+            "username": username,
+            "source": source,
+            "joined_at": datetime.now().isoformat(),
+        })
+    ticket["request_count"] = ticket.get("request_count", 1) + 1
+
+    add_ticket_event(
+        ticket,
+        action="Duplicate request joined",
+        actor=username,
+        details={
+            "source": source,
+            "reason": reason,
+            "request_count": ticket["request_count"],
+        }
+    )
+
+def insert_tickets(ticket_batch):
+    """
+    Append a batch of already-built tickets in one step.
+    Does not move the latest_ticket pointer.
+    """
+    init_tickets()
+    st.session_state.tickets.extend(ticket_batch)
+    with ticket_events.batch():
+        for t in ticket_batch:
+            _index_ticket(t)
+            ticket_events.publish(t, _creation_event(t))
+    return len(ticket_batch)
+
 # -------------------------
 # GETTERS
 # -------------------------
@@ -134,17 +353,238 @@ def set_all_tickets(ticket_list):
     init_tickets()
     st.session_state.tickets = ticket_list
     st.session_state.latest_ticket = ticket_list[-1] if ticket_list else None
+    _rebuild_ticket_indexes(ticket_list)
+
+# -------------------------
+# OPTIMISTIC CONCURRENCY
+# -------------------------
+class TicketConflictError(Exception):
+    """Raised when a commit overlaps with a concurrent change to the same field."""
+
+    def __init__(self, ticket_id, fields):
+        self.ticket_id = ticket_id
+        self.fields = fields
+        super().__init__(
+            f"Ticket {ticket_id} was changed concurrently: "
+            + ", ".join("/".join(f) for f in fields)
+        )
+
+_MISSING = object()
+
+# Dict fields merged per key, so e.g. two departments can review in parallel
+_MERGE_BY_KEY_FIELDS = ("department_reviews",)
+
+# Not diffed: version is managed here, history is append-only,
+# events recorded on a working copy are published on commit
+_UNVERSIONED_FIELDS = ("version", "history", "_pending_events")
+
+def _ticket_changes(old, new):
+    """
+    Field-level diff between two ticket snapshots.
+    Returns {path: new_value}; a path is (field,) or (field, key).
+    """
+    changes = {}
+    for field in old.keys() | new.keys():
+        if field in _UNVERSIONED_FIELDS:
+            continue
+        old_value = old.get(field, _MISSING)
+        new_value = new.get(field, _MISSING)
+
+        if field in _MERGE_BY_KEY_FIELDS and isinstance(new_value, dict):
+            old_value = old_value if isinstance(old_value, dict) else {}
+            for key in old_value.keys() | new_value.keys():
+                if old_value.get(key, _MISSING) != new_value.get(key, _MISSING):
+                    changes[(field, key)] = new_value.get(key, _MISSING)
+        elif old_value != new_value:
+            changes[(field,)] = new_value
+    return changes
+
+def _apply_changes(ticket, changes):
+    for path, value in changes.items():
+        target = ticket
+        if len(path) == 2:
+            if not isinstance(ticket.get(path[0]), dict):
+                ticket[path[0]] = {}
+            target = ticket[path[0]]
+        if value is _MISSING:
+            target.pop(path[-1], None)
+        else:
+            target[path[-1]] = copy.deepcopy(value)
+
+def checkout_ticket(ticket_id):
+    """
+    Return (base, working) copies of a stored ticket for editing.
+    Edit `working` freely, then pass both to commit_ticket().
+    """
+    ticket = find_ticket(ticket_id)
+    if ticket is None:
+        raise KeyError(f"Unknown ticket '{ticket_id}'")
+    return copy.deepcopy(ticket), copy.deepcopy(ticket)
+
+# -------------------------
+# EDIT FORMS
+# -------------------------
+# Forms take their base when they open and keep it across reruns in
+# st.session_state["base_<ticket_id>"]; a checkout inside the submit handler
+# would already contain concurrent changes. edit_forms tracks the page the
+# bases belong to, the open forms and the forms with unsaved edits.
+def _edit_forms():
+    if "edit_forms" not in st.session_state:
+        st.session_state.edit_forms = {"page": None, "open": set(), "changed": set()}
+    return st.session_state.edit_forms
+
+def track_edit_page(page):
+    """Called on every run (app.py): leaving a page releases its form bases."""
+    forms = _edit_forms()
+    if forms["page"] != page:
+        for ticket_id in list(forms["open"]):
+            release_edit_base(ticket_id)
+        forms["page"] = page
+
+def open_edit_forms(ticket_ids):
+    """
+    Bases for the forms shown in this run. Forms no longer shown (e.g. after
+    switching the selected ticket) are released.
+    """
+    ticket_ids = list(ticket_ids)
+    for ticket_id in _edit_forms()["open"] - set(ticket_ids):
+        release_edit_base(ticket_id)
+    return {ticket_id: get_edit_base(ticket_id) for ticket_id in ticket_ids}
+
+def get_edit_base(ticket_id):
+    """
+    Base snapshot for a ticket's edit form. Replaced by the stored ticket
+    when that has a newer version and the form has no unsaved edits.
+    """
+    forms = _edit_forms()
+    key = f"base_{ticket_id}"
+    base = st.session_state.get(key)
+    stored = find_ticket(ticket_id)
+    if stored is None:
+        raise KeyError(f"Unknown ticket '{ticket_id}'")
+
+    if base is None or (
+        stored.get("version", 0) != base.get("version", 0)
+        and ticket_id not in forms["changed"]
+    ):
+        base = copy.deepcopy(stored)
+        st.session_state[key] = base
+    forms["open"].add(ticket_id)
+    return base
+
+def mark_edit_form_changed(ticket_id):
+    """on_change callback of form widgets: keep the base until saved."""
+    _edit_forms()["changed"].add(ticket_id)
+
+def edit_widget_key(base, name):
+    """Widget key per base version, so a refreshed base re-renders the form."""
+    return f"{base['ticket_id']}_{name}_v{base.get('version', 0)}"
+
+def checkout_edit(ticket_id):
+    """Return (base, working) against the base taken by get_edit_base()."""
+    base = get_edit_base(ticket_id)
+    return base, copy.deepcopy(base)
+
+def commit_edit(working, base):
+    """
+    commit_ticket() for an edit form: on success the form has no unsaved
+    edits any more, on a conflict its base is released.
+    """
+    try:
+        current = commit_ticket(working, base)
+    except TicketConflictError:
+        release_edit_base(base["ticket_id"])
+        raise
+    _edit_forms()["changed"].discard(base["ticket_id"])
+    return current
+
+def release_edit_base(ticket_id):
+    """Drop the stored base so the next render starts from the stored ticket."""
+    st.session_state.pop(f"base_{ticket_id}", None)
+    forms = _edit_forms()
+    forms["open"].discard(ticket_id)
+    forms["changed"].discard(ticket_id)
+
+def commit_ticket(working, base, refresh=True):
+    """
+    Compare-and-swap write of a working copy.
+
+    If the stored ticket is still at base's version the changes are applied
+    directly. Otherwise they are merged with the concurrent changes as long
+    as no field (or department review) was changed differently by both and
+    the status was not changed by both; in that case TicketConflictError is
+    raised and nothing is written.
+    History events added to `working` are appended in both cases.
+
+    Only the stored ticket is updated. On success `base` and `working` are
+    refreshed to the stored state, so they can be reused for another commit;
+    batch writers that discard them pass refresh=False.
+    """
+    init_tickets()
+    ticket_id = base["ticket_id"]
+    current = st.session_state.ticket_index.get(ticket_id)
+    if current is None:
+        raise KeyError(f"Unknown ticket '{ticket_id}'")
+
+    pending_events = working.pop("_pending_events", [])
+    ours = _ticket_changes(base, working)
+    base_version = base.get("version", 0)
+
+    if current.get("version", 0) != base_version:
+        theirs = _ticket_changes(base, current)
+        conflicts = [
+            path for path, value in ours.items()
+            if path in theirs and theirs[path] != value
+        ]
+        # Our transition events were validated against base's status; once
+        # the status moved on they are stale, even if both set the same value
+        if ("status",) in ours and current.get("status") != base.get("status"):
+            conflicts = list(dict.fromkeys(conflicts + [("status",)]))
+        if conflicts:
+            working["_pending_events"] = pending_events
+            raise TicketConflictError(ticket_id, sorted(conflicts))
+
+    new_events = working.get("history", [])[len(base.get("history", [])):]
+    if ours or new_events:
+        _apply_changes(current, ours)
+        current.setdefault("history", []).extend(copy.deepcopy(new_events))
+        current["version"] = current.get("version", 0) + 1
+
+        with ticket_events.batch():
+            for event in pending_events:
+                ticket_events.publish(current, event)
+            if ours:
+                ticket_events.publish(current, TicketEvent(
+                    ticket_id=ticket_id,
+                    action="Ticket updated",
+                    actor=(st.session_state.get("user") or {}).get("username", "system"),
+                    timestamp=datetime.now().isoformat(),
+                    details={"fields": sorted("/".join(map(str, p)) for p in ours)},
+                ))
+
+    if refresh:
+        for snapshot in (base, working):
+            snapshot.clear()
+            snapshot.update(copy.deepcopy(current))
+    return current
 
 # -------------------------
 # HISTORY & EVENTS
 # -------------------------
 def add_ticket_event(ticket, action, actor=None, details=None, status=None):
     """
-    Adds a structured event to the ticket history.
-    Optionally updates ticket status.
+    Adds a structured event to the ticket history and publishes it on the
+    ticket event bus. Optionally moves the ticket to `status`; the change is
+    validated against the lifecycle transition table and
+    InvalidTransitionError is raised if it is not allowed.
+
+    Events on a working copy from checkout_ticket() are published when the
+    copy is committed.
     """
     init_tickets()
-    actor = actor or st.session_state.get("user", {}).get("username", "system")
+    actor = actor or (st.session_state.get("user") or {}).get("username", "system")
+
+    transition = apply_transition(ticket, status, actor, action) if status else None
 
     event = {
         "action": action,
@@ -152,15 +592,28 @@ def add_ticket_event(ticket, action, actor=None, details=None, status=None):
         "timestamp": datetime.now().isoformat(),
         "details": details or {}
     }
+    if status:
+        event["new_status"] = status
 
     ticket.setdefault("history", []).append(event)
 
-    if status:
-        if status not in TICKET_STATUSES:
-            raise ValueError(
-                f"Invalid status '{status}', must be one of {TICKET_STATUSES}"
-            )
-        ticket["status"] = status
+    bus_event = TicketEvent(
+        ticket_id=ticket.get("ticket_id"),
+        action=action,
+        actor=actor,
+        timestamp=event["timestamp"],
+        details=event["details"],
+        transition=transition,
+    )
+    stored = st.session_state.ticket_index.get(ticket.get("ticket_id"))
+    if stored is not None and stored is not ticket:
+        ticket.setdefault("_pending_events", []).append(bus_event)
+    else:
+        if stored is not None:
+            # Direct write to the stored ticket: open edit forms must see it
+            ticket["version"] = ticket.get("version", 0) + 1
+        ticket_events.publish(ticket, bus_event)
+    return event
 
 # -------------------------
 # PV CONTEXT HELPERS
@@ -191,7 +644,4 @@ def require_pv_context(ticket, actor="system"):
 # -------------------------
 def find_ticket(ticket_id):
     init_tickets()
-    for t in st.session_state.tickets:
-        if t["ticket_id"] == ticket_id:
-            return t
-    return None
+    return st.session_state.ticket_index.get(ticket_id)
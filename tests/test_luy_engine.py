@@ -0,0 +1,80 @@
+import random
+import re
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+from components.luy_engine import LuyEngine
+
+CSV_PATH = Path(__file__).resolve().parent.parent / "components" / "domain_cap_map.csv"
+
+
+# ---------------------------------------------------------
+# Reference: per-row _match_score scan (before the inverted index)
+# ---------------------------------------------------------
+def scan_suggestions(engine, keyword_map, text, fallback):
+    scores = defaultdict(int)
+    for name, keywords in keyword_map.items():
+        scores[name] = engine._match_score(text, keywords)
+    sorted_results = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    return sorted_results if sorted_results else [(fallback, 0)]
+
+
+def scan_classify(engine, software_name, description, use_case=""):
+    text = engine._clean(f"{software_name} {description} {use_case}")
+    return {
+        "domains": scan_suggestions(engine, engine.DOMAIN_KEYWORDS, text, "Unknown"),
+        "capabilities": scan_suggestions(engine, engine.CAPABILITY_KEYWORDS, text, "Unspecified"),
+    }
+
+
+def sample_records(engine, n=300, seed=7):
+    """Records mixing taxonomy words, unknown words and empty fields."""
+    rng = random.Random(seed)
+    vocabulary = sorted({
+        word
+        for keywords in [*engine.DOMAIN_KEYWORDS.values(), *engine.CAPABILITY_KEYWORDS.values()]
+        for kw in keywords
+        for word in re.findall(r"\w+", kw)
+    })
+    noise = ["foo", "Bar", "x", "2024", "suite", "enterprise", "-", "API,", "ÄÖÜ"]
+    records = [("", "", ""), ("Postman", "", ""), ("", "API testing", "integration")]
+    for _ in range(n):
+        words = rng.sample(vocabulary, rng.randint(0, 8)) + rng.sample(noise, rng.randint(0, 3))
+        rng.shuffle(words)
+        cut = rng.randint(0, len(words))
+        records.append((
+            rng.choice(["Tool", "Postman", "SAP", "", "JIRA Cloud"]),
+            " ".join(words[:cut]).upper() if rng.random() < 0.2 else " ".join(words[:cut]),
+            " ".join(words[cut:]),
+        ))
+    return records
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return LuyEngine(str(CSV_PATH), cache_size=0)
+
+
+def test_classify_software_matches_scan(engine):
+    for record in sample_records(engine):
+        assert engine.classify_software(*record) == scan_classify(engine, *record), record
+
+
+def test_classify_many_matches_scan(engine):
+    records = sample_records(engine)
+    expected = [scan_classify(engine, *record) for record in records]
+    assert engine.classify_many(records) == expected
+    # Dict records and duplicates take the same path
+    dict_records = [dict(zip(("software_name", "description", "use_case"), r)) for r in records * 2]
+    assert engine.classify_many(dict_records) == expected * 2
+
+
+def test_cached_results_match_scan():
+    engine = LuyEngine(str(CSV_PATH))
+    records = sample_records(engine, n=50)
+    expected = [scan_classify(engine, *record) for record in records]
+    assert engine.classify_many(records) == expected
+    assert [engine.classify_software(*record) for record in records] == expected
+    assert engine.cache_info()["hits"] >= len(records)
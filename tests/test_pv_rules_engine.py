@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+
+from components.pv_rules_engine import PVEngine
+
+CSV_PATH = Path(__file__).resolve().parent.parent / "components" / "pv_journey.csv"
+
+SCENARIOS = [*PVEngine.SCENARIO_MAP, "Sonstiges", "", None]
+
+
+# ---------------------------------------------------------
+# Reference: filter loop (before the precomputed lookup)
+# ---------------------------------------------------------
+def filter_loop(engine, product_type, scenario, level="L2"):
+    result = [t for t in engine.tasks if product_type in t["relevanz"]]
+    allowed_processes = PVEngine.SCENARIO_MAP.get(scenario)
+    if allowed_processes:
+        result = [t for t in result if t["prozess"] in allowed_processes]
+    level_value = PVEngine.LEVELS[level]
+    result = [t for t in result if level_value >= PVEngine.PROCESS_MIN_LEVEL.get(t["prozess"], 0)]
+    return sorted(result, key=lambda x: x["prozess"])
+
+
+def group_loop(tasks, field):
+    grouped = {}
+    for t in tasks:
+        grouped.setdefault(t[field], []).append(t)
+    return grouped
+
+
+def all_keys():
+    return [
+        (product_type, scenario, level)
+        for product_type in PVEngine.PRODUCT_TYPES
+        for scenario in SCENARIOS
+        for level in PVEngine.LEVELS
+    ]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return PVEngine(str(CSV_PATH))
+
+
+def test_get_pv_responsibilities_matches_filter_loop(engine):
+    for key in all_keys():
+        expected = filter_loop(engine, *key)
+        result = engine.get_pv_responsibilities(*key)
+        assert list(result) == expected, key
+        # Same task objects, so callers see the engine's task dicts as before
+        assert all(a is b for a, b in zip(result, expected)), key
+
+
+def test_grouping_matches_filter_loop(engine):
+    for key in all_keys():
+        expected = filter_loop(engine, *key)
+        result = engine.get_pv_responsibilities(*key)
+        assert engine.group_by_process(result) == group_loop(expected, "prozess"), key
+        assert engine.group_by_process(list(result)) == group_loop(expected, "prozess"), key
+        assert engine.group_by_frequency(result) == group_loop(expected, "häufigkeit"), key
+        assert dict(engine.get_pv_responsibilities_by_process(*key)) == {
+            process: tuple(tasks) for process, tasks in group_loop(expected, "prozess").items()
+        }, key
+
+
+def test_grouping_of_foreign_and_reordered_tasks(engine):
+    tasks = list(reversed(engine.tasks))
+    assert engine.group_by_process(tasks) == group_loop(tasks, "prozess")
+    copies = [dict(t) for t in engine.tasks[:10]]
+    assert engine.group_by_frequency(copies) == group_loop(copies, "häufigkeit")
+
+
+def test_invalid_arguments_raise(engine):
+    with pytest.raises(ValueError):
+        engine.get_pv_responsibilities("Software", "Maintenance")
+    with pytest.raises(ValueError):
+        engine.get_pv_responsibilities("Fremdsoftware", "Maintenance", level="L9")